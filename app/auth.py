@@ -1,5 +1,6 @@
 import os
 import json
+import functools
 import base64
 import streamlit as st
 import firebase_admin
@@ -8,13 +9,19 @@ from datetime import datetime
 import logging
 import requests
 from typing import Optional, Dict, Any, List
-from app.config import FIREBASE_CONFIG, FIREBASE_SERVICE_ACCOUNT_KEY, GOOGLE_OAUTH_CLIENT_ID, IS_PRODUCTION
+from app.config import FIREBASE_CONFIG, FIREBASE_SERVICE_ACCOUNT_KEY, GOOGLE_OAUTH_CLIENT_ID, IS_PRODUCTION, FIRESTORE_CACHE_TTL
+import time
 import urllib.parse
 
 logger = logging.getLogger(__name__)
 if IS_PRODUCTION:
     logger.setLevel(logging.ERROR)
 
+@functools.lru_cache(maxsize=1)
+def firestore_client():
+    """Return the process-wide Firestore client."""
+    return firestore.client()
+
 class AuthService:
     """
     Firebase authentication and data management service.
@@ -23,6 +30,8 @@ class AuthService:
     
     def __init__(self):
         self.firebase_config = FIREBASE_CONFIG
+        # Firestore snapshots keyed by document path: (snapshot, fetched_at)
+        self._document_cache: Dict[str, Any] = {}
         self._init_admin_sdk()
     
     def _get_redirect_uri(self) -> str:
@@ -212,11 +221,11 @@ class AuthService:
                 "redirect_uri": redirect_uri
             }
             
-            logger.debug(f"TOKEN_EXCHANGE: Sending POST to {url} with payload: {payload}")
+            logger.debug("TOKEN_EXCHANGE: Sending POST to %s with payload: %s", url, payload)
             
             response = requests.post(url, data=payload)
             
-            logger.debug(f"TOKEN_EXCHANGE: Received response. Status: {response.status_code}, Body: {response.text}")
+            logger.debug("TOKEN_EXCHANGE: Received response. Status: %s, Body: %s", response.status_code, response.text)
             
             if response.status_code == 200:
                 token_data = response.json()
@@ -263,24 +272,42 @@ class AuthService:
             if key in st.session_state:
                 del st.session_state[key]
     
+    def _get_document(self, doc_ref) -> Any:
+        """Read a Firestore document, reusing a recent snapshot when available."""
+        cached = self._document_cache.get(doc_ref.path)
+        if cached and time.monotonic() - cached[1] < FIRESTORE_CACHE_TTL:
+            return cached[0]
+        
+        snapshot = doc_ref.get()
+        self._document_cache[doc_ref.path] = (snapshot, time.monotonic())
+        return snapshot
+    
+    def _invalidate_document(self, doc_ref) -> None:
+        """Drop any cached snapshot for a document after it is written."""
+        self._document_cache.pop(doc_ref.path, None)
+    
     def delete_chat_session(self, user_id: str, session_id: str) -> bool:
         """Remove a specific chat session from Firestore."""
         try:
-            db = firestore.client()
+            db = firestore_client()
             doc_ref = db.collection('users').document(user_id).collection('chat_sessions').document(session_id)
             doc_ref.delete()
+            self._invalidate_document(doc_ref)
             return True
         except Exception as e:
             logger.error(f"Failed to delete chat session: {e}")
             return False
     
-    def save_document_session(self, user_id: str, session_id: str, filename: str, file_size: int, chunks_count: int, file_hash: str) -> bool:
-        """Associate document metadata with a chat session."""
+    def save_document_session(self, user_id: str, session_id: str, filename: str, file_size: int, chunks_count: int, file_hash: str, batch: Optional[firestore.WriteBatch] = None) -> bool:
+        """Associate document metadata with a chat session.
+        
+        When a write batch is given the update is queued on it and the caller is responsible for committing.
+        """
         try:
-            db = firestore.client()
+            db = firestore_client()
             session_ref = db.collection('users').document(user_id).collection('chat_sessions').document(session_id)
             
-            session_ref.update({
+            update_data = {
                 'document_metadata': {
                     'filename': filename,
                     'file_size': file_size,
@@ -290,7 +317,15 @@ class AuthService:
                     'upload_timestamp': datetime.now()
                 },
                 'updated_at': datetime.now()
-            })
+            }
+            
+            self._invalidate_document(session_ref)
+            
+            if batch is not None:
+                batch.update(session_ref, update_data)
+                return True
+            
+            session_ref.update(update_data)
             
             logger.info(f"Saved document session for user {user_id}, session {session_id}")
             return True
@@ -301,9 +336,9 @@ class AuthService:
     def get_session_document_info(self, user_id: str, session_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve document metadata for a specific session."""
         try:
-            db = firestore.client()
+            db = firestore_client()
             session_ref = db.collection('users').document(user_id).collection('chat_sessions').document(session_id)
-            session_doc = session_ref.get()
+            session_doc = self._get_document(session_ref)
             
             if session_doc.exists:
                 session_data = session_doc.to_dict()
@@ -313,10 +348,26 @@ class AuthService:
             logger.error(f"Failed to get session document info: {e}")
             return None
 
+    def find_session_by_file_hash(self, user_id: str, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Find a chat session whose document has the given SHA-256 hash."""
+        try:
+            db = firestore_client()
+            sessions_ref = db.collection('users').document(user_id).collection('chat_sessions')
+            query = sessions_ref.where('document_metadata.file_hash', '==', file_hash).limit(1)
+            
+            for doc in query.stream():
+                session_data = doc.to_dict()
+                session_data['id'] = doc.id
+                return session_data
+            return None
+        except Exception as e:
+            logger.error(f"Failed to look up session by file hash: {e}")
+            return None
+
     def get_chat_history(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
         """Retrieve chat history for a user from Firestore."""
         try:
-            db = firestore.client()
+            db = firestore_client()
             sessions_ref = db.collection('users').document(user_id).collection('chat_sessions')
             
             # Order by updated_at descending to get most recent first
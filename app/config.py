@@ -30,6 +30,9 @@ IS_PRODUCTION = (
     os.getenv("K_SERVICE") is not None
 )
 
+# Opt-in diagnostics (extra vector store lookups) for local debugging
+QA_DEBUG = os.getenv("QA_DEBUG") == "1"
+
 # ============================================================================
 # LOGGING CONFIGURATION
 # ============================================================================
@@ -77,6 +80,9 @@ FIREBASE_SERVICE_ACCOUNT_KEY = os.getenv("FIREBASE_SERVICE_ACCOUNT_KEY")
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 SUPPORTED_FILE_TYPES = ["pdf"]
 
+# PDFs at least this large have their pages extracted across worker processes
+PDF_PARALLEL_MIN_SIZE = 5 * 1024 * 1024  # 5MB
+
 # ============================================================================
 # MODEL CONFIGURATION
 # ============================================================================
@@ -84,6 +90,7 @@ SUPPORTED_FILE_TYPES = ["pdf"]
 AVAILABLE_MODELS = ["gemini-2.5-flash", "gemini-2.5-pro"]
 DEFAULT_MODEL = "gemini-2.5-flash"
 DEFAULT_TEMPERATURE = 0.1
+EMBEDDING_MODEL = "models/embedding-001"
 
 # ============================================================================
 # TEXT PROCESSING CONFIGURATION
@@ -94,6 +101,12 @@ CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 TEXT_SEPARATORS = ["\n\n", "\n", " ", ""]
 
+# Chunks sent per embedding request (Gemini's batch limit)
+EMBEDDING_BATCH_SIZE = 100
+# Embedding requests in flight at once, and retries per batch when rate limited
+EMBEDDING_CONCURRENCY = 4
+EMBEDDING_MAX_RETRIES = 3
+
 # ============================================================================
 # RETRIEVAL CONFIGURATION
 # ============================================================================
@@ -103,6 +116,11 @@ DEFAULT_K_DOCS = 5
 DEFAULT_FETCH_K = 10
 SEARCH_TYPE = "mmr"  # Maximum Marginal Relevance
 
+# Answers are reused for questions whose embeddings are at least this similar (cosine)
+SEMANTIC_CACHE_THRESHOLD = 0.97
+SEMANTIC_CACHE_SIZE = 256  # entries kept per loaded document
+SEMANTIC_CACHE_DOCUMENTS = 32  # loaded documents with a cache
+
 # ============================================================================
 # DATABASE CONFIGURATION
 # ============================================================================
@@ -111,9 +129,17 @@ SEARCH_TYPE = "mmr"  # Maximum Marginal Relevance
 CHROMA_PERSIST_DIRECTORY = os.path.abspath("./chroma_db")
 CHROMA_COLLECTION_PREFIX = "user_documents"
 
+# Content-addressed cache of chunk embeddings, one directory per session, deleted with its vector store
+EMBEDDING_CACHE_DIRECTORY = os.path.abspath("./embedding_cache")
+
+# Seconds a Firestore document read is reused within a user session
+FIRESTORE_CACHE_TTL = 60
+
 # Google Cloud Storage configuration
 GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME", "your-app-chroma-db")
 GCS_CHROMA_PREFIX = "chroma_db/"
+# Collection files fetched from GCS in parallel when restoring a session
+GCS_DOWNLOAD_WORKERS = 16
 
 if not GCS_BUCKET_NAME:
     logger.warning("GCS_BUCKET_NAME not set, using default")
@@ -0,0 +1,2 @@
+class DocumentRejectedError(ValueError):
+    """An upload that can't be indexed: too large, not a PDF, or without text."""
@@ -1,12 +1,15 @@
 import os
 import json
+import base64
+import hashlib
 import tempfile
 import shutil
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List
 from google.cloud import storage
 from google.auth import default
-from app.config import GCS_BUCKET_NAME, GCS_CHROMA_PREFIX, IS_PRODUCTION
+from app.config import GCS_BUCKET_NAME, GCS_CHROMA_PREFIX, GCS_DOWNLOAD_WORKERS, IS_PRODUCTION
 
 logger = logging.getLogger(__name__)
 if IS_PRODUCTION:
@@ -87,6 +90,20 @@ class GCSStorage:
             logger.error(f"Error uploading ChromaDB collection: {e}")
             return False
 
+    @staticmethod
+    def _matches_local_file(blob, local_file_path: str) -> bool:
+        """Check whether a local file already has the blob's size and MD5 checksum."""
+        if not blob.md5_hash or not os.path.exists(local_file_path):
+            return False
+        if blob.size is not None and os.path.getsize(local_file_path) != blob.size:
+            return False
+        
+        md5 = hashlib.md5()
+        with open(local_file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                md5.update(block)
+        return base64.b64encode(md5.digest()).decode() == blob.md5_hash
+
     def download_chroma_collection(self, local_path: str, user_id: str, session_id: str) -> bool:
         """Download ChromaDB collection from GCS to local directory."""
         if not self.client:
@@ -97,13 +114,9 @@ class GCSStorage:
             collection_prefix = f"{GCS_CHROMA_PREFIX}{user_id}/{session_id}/"
             os.makedirs(local_path, exist_ok=True)
             
-            blobs = self.bucket.list_blobs(prefix=collection_prefix)
-            downloaded_files = 0
+            blobs = [blob for blob in self.bucket.list_blobs(prefix=collection_prefix) if blob.name != collection_prefix]
             
-            for blob in blobs:
-                if blob.name == collection_prefix:
-                    continue
-                    
+            def download_blob(blob) -> None:
                 relative_path = blob.name[len(collection_prefix):]
                 local_file_path = os.path.join(local_path, relative_path)
                 
@@ -111,12 +124,22 @@ class GCSStorage:
                 if local_dir:
                     os.makedirs(local_dir, exist_ok=True)
                 
+                if self._matches_local_file(blob, local_file_path):
+                    if not IS_PRODUCTION:
+                        logger.debug(f"Skipped unchanged {blob.name}")
+                    return
+                
                 blob.download_to_filename(local_file_path)
-                downloaded_files += 1
                 
                 if not IS_PRODUCTION:
                     logger.debug(f"Downloaded {blob.name} to {local_file_path}")
             
+            # Downloads are network bound, so fetch the collection files concurrently
+            if blobs:
+                with ThreadPoolExecutor(max_workers=min(GCS_DOWNLOAD_WORKERS, len(blobs))) as executor:
+                    list(executor.map(download_blob, blobs))
+            downloaded_files = len(blobs)
+            
             if downloaded_files > 0:
                 logger.info(f"Downloaded {downloaded_files} files for user {user_id}, session {session_id}")
                 return True
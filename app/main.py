@@ -1,42 +1,204 @@
 import streamlit as st
 from datetime import datetime
-from app.config import validate_config, AVAILABLE_MODELS, DEFAULT_MODEL, GOOGLE_OAUTH_CLIENT_ID, logger, IS_PRODUCTION
-from app.auth import AuthService
-from app.pdf_processing import PDFProcessor
-from app.qa_pipeline import QAPipeline
+from firebase_admin import firestore
+from app.config import validate_config, AVAILABLE_MODELS, DEFAULT_MODEL, GOOGLE_OAUTH_CLIENT_ID, logger, IS_PRODUCTION, QA_DEBUG
+from app.auth import AuthService, firestore_client
+from app.exceptions import DocumentRejectedError
 from app.utils import (
     format_file_size, handle_error, 
     show_success, show_info, show_warning, format_timestamp
 )
+import copy
 import hashlib
+import inspect
+import itertools
 import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from google.api_core import exceptions as gexceptions
 
 main_logger = logging.getLogger(__name__)
 if IS_PRODUCTION:
     main_logger.setLevel(logging.ERROR)
 
+@st.cache_resource
+def validated_config() -> bool:
+    """Validate the environment once per process; env vars don't change at runtime."""
+    return validate_config()
+
+@st.cache_resource
+def get_pdf_processor():
+    """Return the shared PDF processor."""
+    # Imported lazily for the same reason as the QA pipeline: it pulls in LangChain
+    from app.pdf_processing import PDFProcessor
+    return PDFProcessor()
+
+@st.cache_resource
+def get_qa_pipeline():
+    """Return the shared QA pipeline (embeddings, Chroma and GCS clients)."""
+    # Imported lazily so the auth screen never loads the LangChain/Chroma stack
+    from app.qa_pipeline import QAPipeline
+    return QAPipeline()
+
+_AUTH_HERO_HTML = """
+<div style="text-align: center; margin-bottom: 2rem;">
+    <h1>🇮🇹 Italian Student Document Assistant</h1>
+    <p style="font-size: 1.2rem; color: #666;">Upload your Italian student documents and get instant answers</p>
+</div>
+"""
+
+_GOOGLE_BUTTON_HTML = """
+<div style="text-align: center; margin: 1rem 0;">
+    <a href="{url}" target="_self" style="text-decoration: none;">
+        <button style="
+            background-color: #4285f4;
+            color: white;
+            border: none;
+            padding: 12px 24px;
+            border-radius: 8px;
+            font-size: 16px;
+            font-weight: 500;
+            cursor: pointer;
+            display: inline-flex;
+            align-items: center;
+            gap: 8px;
+            transition: background-color 0.3s;
+        ">
+            <svg width="18" height="18" viewBox="0 0 24 24">
+                <path fill="white" d="M22.56 12.25c0-.78-.07-1.53-.2-2.25H12v4.26h5.92c-.26 1.37-1.04 2.53-2.21 3.31v2.77h3.57c2.08-1.92 3.28-4.74 3.28-8.09z"/>
+                <path fill="white" d="M12 23c2.97 0 5.46-.98 7.28-2.66l-3.57-2.77c-.98.66-2.23 1.06-3.71 1.06-2.86 0-5.29-1.93-6.16-4.53H2.18v2.84C3.99 20.53 7.7 23 12 23z"/>
+                <path fill="white" d="M5.84 14.09c-.22-.66-.35-1.36-.35-2.09s.13-1.43.35-2.09V7.07H2.18C1.43 8.55 1 10.22 1 12s.43 3.45 1.18 4.93l2.85-2.22.81-.62z"/>
+                <path fill="white" d="M12 5.38c1.62 0 3.06.56 4.21 1.64l3.15-3.15C17.45 2.09 14.97 1 12 1 7.7 1 3.99 3.47 2.18 7.07l3.66 2.84c.87-2.6 3.3-4.53 6.16-4.53z"/>
+            </svg>
+            Continue with Google
+        </button>
+    </a>
+</div>
+"""
+
+_AUTH_ABOUT_HTML = """
+<div style="text-align: center; padding: 2rem;">
+    <h3>🎓 Perfect for International Students in Italy</h3>
+    <p style="font-size: 1.1rem; color: #666;">
+        This app helps you understand complex Italian documents such as:
+    </p>
+    <div style="display: flex; justify-content: center; gap: 2rem; margin-top: 1rem;">
+        <div>📋 <strong>Bandi</strong><br><small>Scholarship calls</small></div>
+        <div>📜 <strong>Regolamenti</strong><br><small>University rules</small></div>
+        <div>🏠 <strong>Contratti</strong><br><small>Housing contracts</small></div>
+        <div>📝 <strong>Modulistica</strong><br><small>Application forms</small></div>
+    </div>
+</div>
+"""
+
+_APP_CSS = """
+<style>
+.main > div {
+    padding-top: 1rem;
+}
+.stChatMessage {
+    margin-bottom: 1rem;
+}
+.stButton > button {
+    width: 100%;
+}
+.stSelectbox > div > div {
+    background-color: #f0f2f6;
+}
+.stTabs [data-baseweb="tab-list"] {
+    gap: 24px;
+}
+.stTabs [data-baseweb="tab"] {
+    height: 50px;
+    padding-left: 20px;
+    padding-right: 20px;
+}
+.css-1d391kg {
+    max-height: 70vh;
+    overflow-y: auto;
+}
+</style>
+"""
+
+_FOOTER_HTML = """
+<div style="text-align: center; color: #666; padding: 1rem;">
+    Made for international students in Italy 🇮🇹
+</div>
+"""
+
+_QUICK_ACTIONS = (
+    ("📄 Summarize Document", "Please provide a comprehensive summary of this document, highlighting the main points, important dates, requirements, and key information."),
+    ("🎯 Key Points", "Extract the most important key points from this document in bullet format, focusing on deadlines, requirements, and procedures."),
+    ("📋 Eligibility Criteria", "What are the eligibility criteria mentioned in this document?"),
+)
+
+MAX_PROCESSED_AUTH_CODES = 32
+MAX_CACHED_QA_CHAINS = 8
+
+# st.fragment is only available on newer Streamlit releases
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+# Keyed containers (newer Streamlit releases) keep a message's element identity stable across reruns
+_CONTAINER_ACCEPTS_KEY = "key" in inspect.signature(st.container).parameters
+_message_seq = itertools.count()
+
+# Shared pool for blocking I/O that can overlap with rendering
+_background_executor = ThreadPoolExecutor(max_workers=4)
+# Vector store deletes are slow (GCS, pending uploads), so they never occupy the shared pool
+_delete_executor = ThreadPoolExecutor(max_workers=2)
+
+# Chat history kept in session state; older turns are reloaded from Firestore on demand
+MAX_DISPLAYED_MESSAGES = 40
+SOURCES_KEPT_TURNS = 5
+SOURCE_PREVIEW_CHARS = 200
+
+# Minimum seconds between redraws of a streaming answer
+STREAM_UPDATE_INTERVAL = 0.05
+
+_SESSION_DEFAULTS = {
+    "messages": [],
+    "qa_chain": None,
+    "document_processed": False,
+    "current_document": None,
+    "current_session_id": None,
+    "current_session_title": "New Chat",
+    "processed_auth_codes": OrderedDict(),
+    "qa_chain_cache": OrderedDict(),
+    "last_processed_code": None,
+    "pending_question": None,
+    "archived_turns": 0,
+    "_source_cache": {},
+    "pending_saves": [],
+}
+
 def initialize_simple_session_state():
     """Initialize session state variables."""
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    if "qa_chain" not in st.session_state:
-        st.session_state.qa_chain = None
-    if "qa_pipeline" not in st.session_state:
-        st.session_state.qa_pipeline = QAPipeline()
-    if "document_processed" not in st.session_state:
-        st.session_state.document_processed = False
-    if "current_document" not in st.session_state:
-        st.session_state.current_document = None
-    if "current_session_id" not in st.session_state:
-        st.session_state.current_session_id = None
-    if "current_session_title" not in st.session_state:
-        st.session_state.current_session_title = "New Chat"
+    if st.session_state.get("_init_done"):
+        return
+    
+    for key, value in _SESSION_DEFAULTS.items():
+        # Copy so mutable defaults are never shared between sessions
+        st.session_state.setdefault(key, copy.copy(value))
     if "auth_service" not in st.session_state:
         st.session_state.auth_service = AuthService()
-    if "processed_auth_codes" not in st.session_state:
-        st.session_state.processed_auth_codes = set()
-    if "last_processed_code" not in st.session_state:
-        st.session_state.last_processed_code = None
+    st.session_state._init_done = True
+
+def cache_qa_chain(user_id: str, session_id: str, qa_chain) -> None:
+    """Keep a session's QA chain for reuse, evicting the least recently cached."""
+    qa_chain_cache = st.session_state.qa_chain_cache
+    qa_chain_cache[(user_id, session_id)] = qa_chain
+    qa_chain_cache.move_to_end((user_id, session_id))
+    if len(qa_chain_cache) > MAX_CACHED_QA_CHAINS:
+        qa_chain_cache.popitem(last=False)
+
+def remember_auth_code(code: str) -> None:
+    """Record a processed OAuth code, keeping only the most recent entries."""
+    processed_codes = st.session_state.processed_auth_codes
+    processed_codes[code] = None
+    processed_codes.move_to_end(code)
+    if len(processed_codes) > MAX_PROCESSED_AUTH_CODES:
+        processed_codes.popitem(last=False)
 
 def handle_google_oauth_callback():
     """Handle Google OAuth callback and process authentication."""
@@ -47,27 +209,39 @@ def handle_google_oauth_callback():
         if not query_params or "code" not in query_params:
             return
             
-        main_logger.debug(f"OAUTH_CALLBACK: Received query params: {query_params}")
+        if main_logger.isEnabledFor(logging.DEBUG):
+            main_logger.debug("OAUTH_CALLBACK: Received query params: %s", query_params.to_dict())
         
         if "code" in query_params and "state" in query_params and query_params["state"] == "google_auth":
             code = query_params["code"]
             
-            if code == st.session_state.get("last_processed_code"):
+            if code in st.session_state.processed_auth_codes or code == st.session_state.get("last_processed_code"):
                 main_logger.warning("OAUTH_CALLBACK: Ignoring already processed auth code.")
+                st.query_params.clear()
                 return
 
             main_logger.info(f"OAUTH_CALLBACK: Google OAuth code received: {code[:10]}...")
             
+            # The profile lookup needs the token, so the two calls can't overlap; show progress instead
             auth_service = st.session_state.auth_service
-            access_token = auth_service.exchange_google_code_for_token(code)
+            with st.status("Signing in with Google...") as status:
+                status.update(label="Exchanging authorization code...")
+                access_token = auth_service.exchange_google_code_for_token(code)
+                user_info = None
+                if access_token:
+                    main_logger.info("OAUTH_CALLBACK: Google access token obtained successfully.")
+                    status.update(label="Fetching your profile...")
+                    user_info = auth_service.login_with_google(access_token)
+                status.update(
+                    label="Signed in" if user_info else "Sign-in failed",
+                    state="complete" if user_info else "error"
+                )
             
             if access_token:
-                main_logger.info("OAUTH_CALLBACK: Google access token obtained successfully.")
-                user_info = auth_service.login_with_google(access_token)
-                
                 if user_info:
                     st.session_state.user = user_info
                     st.session_state.last_processed_code = code
+                    remember_auth_code(code)
                     main_logger.info(f"OAUTH_CALLBACK: User logged in successfully: {user_info.get('email')}")
                     st.query_params.clear()
                     st.rerun()
@@ -83,12 +257,7 @@ def handle_google_oauth_callback():
 
 def render_auth_section():
     """Render authentication section in main area when not logged in."""
-    st.markdown("""
-    <div style="text-align: center; margin-bottom: 2rem;">
-        <h1>🇮🇹 Italian Student Document Assistant</h1>
-        <p style="font-size: 1.2rem; color: #666;">Upload your Italian student documents and get instant answers</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_AUTH_HERO_HTML, unsafe_allow_html=True)
     
     # Create columns for centering
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -102,34 +271,7 @@ def render_auth_section():
             google_oauth_url = st.session_state.auth_service.get_google_oauth_url()
             
             if google_oauth_url:
-                st.markdown(f"""
-                <div style="text-align: center; margin: 1rem 0;">
-                    <a href="{google_oauth_url}" target="_self" style="text-decoration: none;">
-                        <button style="
-                            background-color: #4285f4;
-                            color: white;
-                            border: none;
-                            padding: 12px 24px;
-                            border-radius: 8px;
-                            font-size: 16px;
-                            font-weight: 500;
-                            cursor: pointer;
-                            display: inline-flex;
-                            align-items: center;
-                            gap: 8px;
-                            transition: background-color 0.3s;
-                        ">
-                            <svg width="18" height="18" viewBox="0 0 24 24">
-                                <path fill="white" d="M22.56 12.25c0-.78-.07-1.53-.2-2.25H12v4.26h5.92c-.26 1.37-1.04 2.53-2.21 3.31v2.77h3.57c2.08-1.92 3.28-4.74 3.28-8.09z"/>
-                                <path fill="white" d="M12 23c2.97 0 5.46-.98 7.28-2.66l-3.57-2.77c-.98.66-2.23 1.06-3.71 1.06-2.86 0-5.29-1.93-6.16-4.53H2.18v2.84C3.99 20.53 7.7 23 12 23z"/>
-                                <path fill="white" d="M5.84 14.09c-.22-.66-.35-1.36-.35-2.09s.13-1.43.35-2.09V7.07H2.18C1.43 8.55 1 10.22 1 12s.43 3.45 1.18 4.93l2.85-2.22.81-.62z"/>
-                                <path fill="white" d="M12 5.38c1.62 0 3.06.56 4.21 1.64l3.15-3.15C17.45 2.09 14.97 1 12 1 7.7 1 3.99 3.47 2.18 7.07l3.66 2.84c.87-2.6 3.3-4.53 6.16-4.53z"/>
-                            </svg>
-                            Continue with Google
-                        </button>
-                    </a>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(_GOOGLE_BUTTON_HTML.format(url=google_oauth_url), unsafe_allow_html=True)
             
             st.markdown("---")
             st.markdown("#### 📧 Or sign in with email")
@@ -184,120 +326,113 @@ def render_auth_section():
     
     # About section
     st.markdown("---")
-    st.markdown("""
-    <div style="text-align: center; padding: 2rem;">
-        <h3>🎓 Perfect for International Students in Italy</h3>
-        <p style="font-size: 1.1rem; color: #666;">
-            This app helps you understand complex Italian documents such as:
-        </p>
-        <div style="display: flex; justify-content: center; gap: 2rem; margin-top: 1rem;">
-            <div>📋 <strong>Bandi</strong><br><small>Scholarship calls</small></div>
-            <div>📜 <strong>Regolamenti</strong><br><small>University rules</small></div>
-            <div>🏠 <strong>Contratti</strong><br><small>Housing contracts</small></div>
-            <div>📝 <strong>Modulistica</strong><br><small>Application forms</small></div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_AUTH_ABOUT_HTML, unsafe_allow_html=True)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_chat_sessions(user_id: str, limit: int = 20):
+    """Fetch chat sessions with sidebar display strings precomputed.
+    
+    Cached per user across reruns; cleared whenever this app writes to a session.
+    """
+    sessions = st.session_state.auth_service.get_chat_history(user_id, limit=limit)
+    for session in sessions:
+        timestamp = session.get('session_timestamp')
+        session['_time_str'] = format_timestamp(timestamp) if timestamp else "Unknown"
+        title = session.get('session_title', 'Untitled Chat')
+        session['_display_title'] = title[:30] + "..." if len(title) > 30 else title
+        session['_option_label'] = f"📄 {session['_display_title']} · 🕒 {session['_time_str']}"
+    return sessions
 
 def render_chat_sidebar():
     """Render chat history sidebar."""
+    with st.sidebar:
+        render_chat_sidebar_contents()
+
+@_fragment
+def render_chat_sidebar_contents():
+    """Render the sidebar body; widget interactions here rerun only the sidebar."""
     try:
-        user_id = st.session_state.user.get('localId')
+        if st.button("➕ New Chat", use_container_width=True, type="primary"):
+            start_new_chat()
         
-        # Cache chat sessions to avoid repeated API calls
-        if 'cached_chat_sessions' not in st.session_state or st.session_state.get('refresh_chat_cache', False):
-            st.session_state.cached_chat_sessions = st.session_state.auth_service.get_chat_history(user_id, limit=20)
-            st.session_state.refresh_chat_cache = False
+        st.markdown("---")
         
-        chat_sessions = st.session_state.cached_chat_sessions
+        st.markdown("### 💬 Chat History")
         
-        with st.sidebar:
-            if st.button("➕ New Chat", use_container_width=True, type="primary"):
-                start_new_chat()
-            
-            st.markdown("---")
-            
-            st.markdown("### 💬 Chat History")
-            
-            if 'user' in st.session_state:
-                user_id = st.session_state.user.get('localId')
-                if user_id:
-                    chat_sessions = st.session_state.auth_service.get_chat_history(user_id, limit=20)
+        if 'user' in st.session_state:
+            user_id = st.session_state.user.get('localId')
+            if user_id:
+                chat_sessions = fetch_chat_sessions(user_id, limit=20)
+                
+                if chat_sessions:
+                    # One radio to switch and one selectbox to delete keep the widget count constant
+                    sessions_by_id = {session['id']: session for session in chat_sessions}
+                    session_ids = list(sessions_by_id)
+                    current_id = st.session_state.current_session_id
                     
-                    if chat_sessions:
-                        chat_container = st.container()
-                        with chat_container:
-                            for session in chat_sessions:
-                                session_id = session.get('id')
-                                session_title = session.get('session_title', 'Untitled Chat')
-                                timestamp = session.get('session_timestamp')
-                                message_count = session.get('message_count', 0)
-                                
-                                time_str = format_timestamp(timestamp) if timestamp else "Unknown"
-                                display_title = session_title[:30] + "..." if len(session_title) > 30 else session_title
-                                is_current = st.session_state.current_session_id == session_id
-                                
-                                col1, col2 = st.columns([4, 1])
-                                
-                                with col1:
-                                    button_text = f"📄 {display_title}"
-                                    if is_current:
-                                        button_text = f"🔹 {display_title}"
-                                    
-                                    if st.button(
-                                        button_text,
-                                        key=f"chat_{session_id}",
-                                        help=f"{time_str} • {message_count} messages",
-                                        use_container_width=True,
-                                        disabled=is_current
-                                    ):
-                                        load_chat_session(session)
-                                
-                                with col2:
-                                    if st.button(
-                                        "🗑️",
-                                        key=f"delete_{session_id}",
-                                        help="Delete this chat session",
-                                        use_container_width=True,
-                                        type="secondary"
-                                    ):
-                                        delete_chat_session(session_id, session_title)
-                                
-                                st.caption(f"🕒 {time_str}")
-                                st.markdown("---")
-                    else:
-                        st.info("No previous chats found")
+                    selected_id = st.radio(
+                        "Chat sessions",
+                        session_ids,
+                        index=session_ids.index(current_id) if current_id in sessions_by_id else None,
+                        format_func=lambda sid: sessions_by_id[sid]['_option_label'],
+                        label_visibility="collapsed"
+                    )
+                    if selected_id is not None and selected_id != current_id:
+                        load_chat_session(sessions_by_id[selected_id])
+                    
+                    st.markdown("---")
+                    
+                    delete_id = st.selectbox(
+                        "Delete a chat session",
+                        session_ids,
+                        index=None,
+                        format_func=lambda sid: sessions_by_id[sid]['_display_title'],
+                        placeholder="Choose a chat to delete"
+                    )
+                    if st.button(
+                        "🗑️ Delete",
+                        help="Delete the selected chat session",
+                        use_container_width=True,
+                        type="secondary",
+                        disabled=delete_id is None
+                    ):
+                        delete_chat_session(delete_id, sessions_by_id[delete_id].get('session_title', 'Untitled Chat'))
+                else:
+                    st.info("No previous chats found")
+        
+        st.markdown("---")
+        
+        with st.expander("⚙️ Settings"):
+            # Model selection
+            model = st.selectbox(
+                "AI Model:",
+                AVAILABLE_MODELS,
+                index=0,
+                help="Choose the AI model for processing"
+            )
             
+            temperature = st.slider(
+                "Response Style:",
+                0.0, 1.0, 0.1, 0.1,
+                help="0 = Factual, 1 = Creative"
+            )
+        
+        if 'user' in st.session_state:
             st.markdown("---")
+            user_email = st.session_state.user.get('email', 'User')
+            st.caption(f"👤 {user_email}")
             
-            with st.expander("⚙️ Settings"):
-                # Model selection
-                model = st.selectbox(
-                    "AI Model:",
-                    AVAILABLE_MODELS,
-                    index=0,
-                    help="Choose the AI model for processing"
-                )
-                
-                temperature = st.slider(
-                    "Response Style:",
-                    0.0, 1.0, 0.1, 0.1,
-                    help="0 = Factual, 1 = Creative"
-                )
-            
-            if 'user' in st.session_state:
-                st.markdown("---")
-                user_email = st.session_state.user.get('email', 'User')
-                st.caption(f"👤 {user_email}")
-                
-                if st.button("🚪 Sign Out", use_container_width=True, type="secondary"):
-                    sign_out_user()
+            if st.button("🚪 Sign Out", use_container_width=True, type="secondary"):
+                sign_out_user()
     except Exception as e:
         handle_error(e, "Error rendering chat sidebar")
 
 def start_new_chat():
     """Start a new chat session."""
+    flush_pending_saves()
     st.session_state.messages = []
+    st.session_state.archived_turns = 0
+    st.session_state._source_cache = {}
     st.session_state.qa_chain = None
     st.session_state.document_processed = False
     st.session_state.current_document = None
@@ -305,45 +440,128 @@ def start_new_chat():
     st.session_state.current_session_title = "New Chat"
     st.rerun()
 
-def load_chat_session(session):
-    """Load a previous chat session with document embeddings."""
+def _run_retriever_warmup(qa_chain) -> None:
+    """Issue a throwaway retrieval so the first real question skips cold-start costs."""
     try:
-        st.session_state.current_session_id = session.get('id')
-        st.session_state.current_session_title = session.get('session_title', 'Untitled Chat')
+        # Search by a stored vector; embedding a warm-up query would cost an API call
+        vector_store = qa_chain.retriever.vectorstore
+        sample = vector_store.get(limit=1, include=["embeddings"])
+        if len(sample["embeddings"]):
+            vector_store.similarity_search_by_vector(sample["embeddings"][0], k=1)
+    except Exception as e:
+        main_logger.warning(f"Retriever warm-up failed: {e}")
+
+def warm_up_retriever(qa_chain) -> None:
+    """Warm up the retriever in the background, once per QA chain."""
+    warmup = st.session_state.get('_warmup')
+    if warmup and warmup[0] is qa_chain:
+        return
+    st.session_state._warmup = (qa_chain, _background_executor.submit(_run_retriever_warmup, qa_chain))
+
+def fetch_session_resources(qa_pipeline, user_id: str, session_id: str):
+    """Fetch document metadata and vector store for a session concurrently."""
+    auth_service = st.session_state.auth_service
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        doc_future = executor.submit(auth_service.get_session_document_info, user_id, session_id)
+        vector_store_future = executor.submit(qa_pipeline.load_vector_store, user_id, session_id)
+        return doc_future.result(), vector_store_future.result()
+
+def build_messages_from_history(saved_history: list) -> list:
+    """Convert a persisted chat history into chat messages."""
+    # Saved history is homogeneous per session: dicts, or legacy (question, answer) pairs
+    if saved_history and isinstance(saved_history[0], dict):
+        pairs = ((item.get('question', ''), item.get('answer', '')) for item in saved_history)
+    else:
+        pairs = saved_history
+    return list(itertools.chain.from_iterable(
+        ({"role": "user", "content": question}, {"role": "assistant", "content": answer, "saved": True})
+        for question, answer in pairs
+    ))
+
+def compact_messages() -> None:
+    """Keep only recent messages in session state; older turns stay in Firestore."""
+    messages = st.session_state.messages
+    if len(messages) > MAX_DISPLAYED_MESSAGES:
+        # Cut at a user message so no answer is kept without its question
+        cut = len(messages) - MAX_DISPLAYED_MESSAGES
+        while cut < len(messages) and messages[cut]["role"] != "user":
+            cut += 1
+        st.session_state.archived_turns += sum(
+            1 for message in messages[:cut] if message["role"] == "assistant" and message.get("saved")
+        )
+        del messages[:cut]
+    
+    # Source documents are only kept for the most recent answers
+    assistant_messages = [message for message in messages if message["role"] == "assistant"]
+    for message in assistant_messages[:-SOURCES_KEPT_TURNS]:
+        message.pop("source_ids", None)
+    
+    referenced = {sid for message in assistant_messages for sid in message.get("source_ids", ())}
+    source_cache = st.session_state._source_cache
+    for sid in source_cache.keys() - referenced:
+        del source_cache[sid]
+
+def load_earlier_messages() -> None:
+    """Restore archived turns of the current session from Firestore."""
+    user_id = st.session_state.user.get('localId')
+    session_id = st.session_state.current_session_id
+    archived_turns = st.session_state.archived_turns
+    if not (user_id and session_id and archived_turns):
+        return
+    
+    try:
+        flush_pending_saves()
+        session_ref = firestore_client().collection('users').document(user_id).collection('chat_sessions').document(session_id)
+        session_doc = session_ref.get()
+        saved_history = session_doc.to_dict().get('chat_history', []) if session_doc.exists else []
         
-        saved_history = session.get('chat_history', [])
-        messages = []
+        earlier = build_messages_from_history(saved_history[:archived_turns])
+        st.session_state.messages = earlier + st.session_state.messages
+        st.session_state.archived_turns = 0
+    except Exception as e:
+        handle_error(e, "Failed to load earlier messages")
+
+def load_chat_session(session, vector_store=None):
+    """Load a previous chat session with document embeddings.
+    
+    A vector store that the caller has already loaded for this session can be passed in.
+    """
+    try:
+        flush_pending_saves()
         
-        for item in saved_history:
-            if isinstance(item, dict):
-                messages.append({"role": "user", "content": item.get('question', '')})
-                messages.append({"role": "assistant", "content": item.get('answer', '')})
-            else:
-                question, answer = item
-                messages.append({"role": "user", "content": question})
-                messages.append({"role": "assistant", "content": answer})
+        st.session_state.current_session_id = session.get('id')
+        st.session_state.current_session_title = session.get('session_title', 'Untitled Chat')
         
-        st.session_state.messages = messages
+        st.session_state.messages = build_messages_from_history(session.get('chat_history', []))
+        st.session_state.archived_turns = 0
+        st.session_state._source_cache = {}
+        compact_messages()
         
         user_id = st.session_state.user.get('localId')
         session_id = st.session_state.current_session_id
         
         if user_id and session_id:
-            doc_info = st.session_state.auth_service.get_session_document_info(user_id, session_id)
-            
-            qa_pipeline = QAPipeline()
-            
-            if not IS_PRODUCTION:
+            qa_pipeline = get_qa_pipeline()
+
+            if QA_DEBUG:
                 collections = qa_pipeline.list_collections()
-                main_logger.info(f"Available collections: {collections}")
+                main_logger.info("Available collections: %s", collections)
                 collection_info = qa_pipeline.get_collection_info(user_id, session_id)
-                main_logger.info(f"Collection info for session: {collection_info}")
-            
-            vector_store = qa_pipeline.load_vector_store(user_id, session_id)
-            
-            if vector_store:
+                main_logger.info("Collection info for session: %s", collection_info)
+
+            # Sessions opened earlier in this browser session keep their chain
+            qa_chain = st.session_state.qa_chain_cache.get((user_id, session_id))
+            if qa_chain is not None or vector_store is not None:
+                doc_info = session.get('document_metadata')
+            else:
+                doc_info, vector_store = fetch_session_resources(qa_pipeline, user_id, session_id)
+
+            if qa_chain is None and vector_store:
                 qa_chain = qa_pipeline.setup_qa_chain(vector_store)
-                
+                cache_qa_chain(user_id, session_id, qa_chain)
+                warm_up_retriever(qa_chain)
+
+            if qa_chain is not None:
                 st.session_state.qa_chain = qa_chain
                 st.session_state.document_processed = True
                 
@@ -385,10 +603,11 @@ def load_chat_session(session):
 
 def sign_out_user():
     """Sign out the current user."""
-    st.session_state.auth_service.logout()
-    for key in list(st.session_state.keys()):
-        if key not in ['auth_service']:
-            del st.session_state[key]
+    flush_pending_saves()
+    auth_service = st.session_state.auth_service
+    auth_service.logout()
+    st.session_state.clear()
+    st.session_state.auth_service = auth_service
     st.rerun()
 
 def render_header():
@@ -441,15 +660,21 @@ def process_document(uploaded_file):
     """Process the uploaded document and create/update session."""
     try:
         with st.spinner("🔍 Processing your document... This may take a moment."):
-            pdf_processor = PDFProcessor()
-            qa_pipeline = st.session_state.qa_pipeline
+            pdf_processor = get_pdf_processor()
+            qa_pipeline = get_qa_pipeline()
             
-            file_content = uploaded_file.getvalue()
-            file_hash = hashlib.sha256(file_content).hexdigest()
+            # The hash gates parsing: an already indexed upload skips the whole pipeline
+            file_hash = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+            user_id = st.session_state.user.get('localId')
             
-            chunks = pdf_processor.load_and_process_pdf(uploaded_file)
+            existing = st.session_state.auth_service.find_session_by_file_hash(user_id, file_hash)
+            if existing:
+                vector_store = qa_pipeline.load_vector_store(user_id, existing['id'])
+                if vector_store:
+                    load_chat_session(existing, vector_store=vector_store)
+                    return
             
-            user_id = st.session_state.user.get('localId')
+            chunks = pdf_processor.load_and_process_pdf(uploaded_file)
             session_id = st.session_state.current_session_id
             
             if not session_id:
@@ -459,31 +684,35 @@ def process_document(uploaded_file):
                 st.session_state.current_session_id = session_id
                 st.session_state.current_session_title = session_title
             
-            vector_store = qa_pipeline.create_vector_store(chunks, user_id, session_id)
-            
-            collection_info = qa_pipeline.get_collection_info(user_id, session_id)
-            if not collection_info.get('exists') or collection_info.get('count', 0) == 0:
+            vector_store, inserted = qa_pipeline.create_vector_store(chunks, user_id, session_id)
+            if inserted == 0:
                 raise ValueError("Vector store was not created properly")
             
             qa_chain = qa_pipeline.setup_qa_chain(vector_store)
             
             st.session_state.qa_chain = qa_chain
+            cache_qa_chain(user_id, session_id, qa_chain)
+            warm_up_retriever(qa_chain)
             st.session_state.document_processed = True
             st.session_state.current_document = uploaded_file.name
             
             if user_id and session_id:
+                db = firestore_client()
+                session_ref = db.collection('users').document(user_id).collection('chat_sessions').document(session_id)
+                
+                # Commit document metadata and session name in a single RPC
+                batch = db.batch()
                 st.session_state.auth_service.save_document_session(
                     user_id, session_id, uploaded_file.name, 
-                    uploaded_file.size, len(chunks), file_hash
+                    uploaded_file.size, len(chunks), file_hash,
+                    batch=batch
                 )
-                
-                from firebase_admin import firestore
-                db = firestore.client()
-                session_ref = db.collection('users').document(user_id).collection('chat_sessions').document(session_id)
-                session_ref.update({
+                batch.update(session_ref, {
                     'document_name': uploaded_file.name,
                     'updated_at': datetime.now()
                 })
+                batch.commit()
+                fetch_chat_sessions.clear()
             
             st.session_state.messages.append({
                 "role": "system",
@@ -492,19 +721,25 @@ def process_document(uploaded_file):
             
             show_success("✅ Document processed and saved successfully!")
             
-            if not IS_PRODUCTION:
-                main_logger.info(f"Document processed: {collection_info}")
+            if QA_DEBUG:
+                main_logger.info(f"Document processed: {inserted} chunks indexed")
             
             st.rerun()
             
+    except DocumentRejectedError as e:
+        # Rejected uploads (size, type, empty PDF) are expected; skip the traceback
+        main_logger.warning("Document rejected: %r", e)
+        st.error(f"Error processing document: {e}")
+    except gexceptions.GoogleAPICallError as e:
+        main_logger.error("Google API call failed while processing document: %r", e)
+        st.error("Error processing document")
     except Exception as e:
         handle_error(e, "Error processing document")
 
 def create_new_session(user_id: str, session_title: str, document_name: str):
     """Create a new chat session in Firestore."""
     try:
-        from firebase_admin import firestore
-        db = firestore.client()
+        db = firestore_client()
         
         doc_ref = db.collection('users').document(user_id).collection('chat_sessions').document()
         doc_ref.set({
@@ -516,55 +751,88 @@ def create_new_session(user_id: str, session_title: str, document_name: str):
             'created_at': datetime.now(),
             'updated_at': datetime.now()
         })
+        fetch_chat_sessions.clear()
         
         return doc_ref.id
     except Exception as e:
         print(f"Error creating session: {e}")
         return None
 
-def auto_save_message(user_id: str, session_id: str, question: str, answer: str):
-    """Automatically save each Q&A pair to Firestore."""
+def queue_message_save(user_id: str, session_id: str, question: str, answer: str, chat_message: dict) -> None:
+    """Buffer a Q&A pair for the next Firestore write; chat_message is marked saved once it is written."""
+    st.session_state.pending_saves.append({
+        'user_id': user_id,
+        'session_id': session_id,
+        'chat_message': chat_message,
+        'message': {
+            'question': question,
+            'answer': answer,
+            'timestamp': datetime.now()
+        }
+    })
+
+def take_pending_saves() -> list:
+    """Return and clear buffered saves."""
+    pending = st.session_state.get('pending_saves')
+    if not pending:
+        return []
+    
+    st.session_state.pending_saves = []
+    return pending
+
+def save_pending_messages(pending: list) -> bool:
+    """Write buffered Q&A pairs to Firestore in a single batch."""
     try:
-        from firebase_admin import firestore
-        db = firestore.client()
+        messages_by_session = {}
+        for item in pending:
+            messages_by_session.setdefault((item['user_id'], item['session_id']), []).append(item['message'])
         
-        session_ref = db.collection('users').document(user_id).collection('chat_sessions').document(session_id)
-        session_doc = session_ref.get()
+        db = firestore_client()
         
-        if session_doc.exists:
-            session_data = session_doc.to_dict()
-            current_history = session_data.get('chat_history', [])
-            
-            new_message = {
-                'question': question,
-                'answer': answer,
-                'timestamp': datetime.now()
-            }
-            current_history.append(new_message)
-            
-            for attempt in range(3):
-                try:
-                    session_ref.update({
-                        'chat_history': current_history,
-                        'message_count': len(current_history),
+        # Append atomically so the write payload stays constant as the history grows
+        for attempt in range(3):
+            try:
+                batch = db.batch()
+                for (user_id, session_id), messages in messages_by_session.items():
+                    session_ref = db.collection('users').document(user_id).collection('chat_sessions').document(session_id)
+                    batch.update(session_ref, {
+                        'chat_history': firestore.ArrayUnion(messages),
+                        'message_count': firestore.Increment(len(messages)),
                         'updated_at': datetime.now()
                     })
-                    if not IS_PRODUCTION:
-                        main_logger.info(f"Auto-saved message for session {session_id}")
-                    return True
-                except Exception as retry_error:
-                    logger.warning(f"Retry {attempt + 1}/3 failed for auto-save: {retry_error}")
-                    if attempt == 2:
-                        raise retry_error
-                    
-        else:
-            logger.warning(f"Session {session_id} not found for auto-save")
-            return False
+                batch.commit()
+                fetch_chat_sessions.clear()
+                if not IS_PRODUCTION:
+                    main_logger.info(f"Auto-saved {len(pending)} messages across {len(messages_by_session)} sessions")
+                return True
+            except gexceptions.NotFound:
+                logger.warning("Session not found for auto-save")
+                return False
+            except (gexceptions.ServiceUnavailable, gexceptions.DeadlineExceeded, gexceptions.Aborted) as retry_error:
+                logger.warning(f"Retry {attempt + 1}/3 failed for auto-save: {retry_error}")
+                if attempt == 2:
+                    raise retry_error
             
     except Exception as e:
-        main_logger.error(f"Error auto-saving message: {e}")
+        main_logger.error(f"Error auto-saving messages: {e}")
         return False
 
+def finish_pending_saves(pending: list, saved: bool) -> bool:
+    """Mark written Q&A pairs as saved, or put them back in the buffer for the next write."""
+    if saved:
+        for item in pending:
+            item['chat_message']['saved'] = True
+    else:
+        st.session_state.pending_saves[:0] = pending
+    return saved
+
+def flush_pending_saves() -> bool:
+    """Write any buffered Q&A pairs, such as ones whose earlier write failed."""
+    pending = take_pending_saves()
+    if not pending:
+        return True
+    return finish_pending_saves(pending, save_pending_messages(pending))
+
 def render_example_questions():
     """Render example questions."""
     st.markdown("### 💡 Example Questions You Can Ask")
@@ -589,6 +857,64 @@ def render_example_questions():
         - Summarize the main points
         """)
 
+def cache_sources(source_documents) -> list:
+    """Store source previews once per session and return their content-hash IDs."""
+    source_cache = st.session_state._source_cache
+    source_ids = []
+    for doc in source_documents:
+        content = doc.page_content
+        sid = hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
+        if sid not in source_cache:
+            # Only the preview is ever shown, so the full chunk text is not kept
+            source_cache[sid] = content[:SOURCE_PREVIEW_CHARS] + "..." if len(content) > SOURCE_PREVIEW_CHARS else content
+        source_ids.append(sid)
+    # Preserve retrieval order while dropping duplicate chunks
+    return list(dict.fromkeys(source_ids))
+
+def resolve_sources(source_ids) -> list:
+    """Look up cached source previews by ID."""
+    source_cache = st.session_state._source_cache
+    return [source_cache[sid] for sid in source_ids if sid in source_cache]
+
+def render_sources(previews):
+    """Render source previews for an assistant message."""
+    with st.expander("📖 View Sources"):
+        for i, preview in enumerate(previews[:3]):
+            st.markdown(f"**Source {i+1}:**\n\n```\n{preview}\n```")
+
+def message_container(message):
+    """Return a container whose identity follows the message rather than its position."""
+    if "id" not in message:
+        # The sequence number keeps repeated questions/answers distinct
+        seed = f"{message['role']}\0{message['content']}\0{next(_message_seq)}"
+        message["id"] = hashlib.blake2b(seed.encode(), digest_size=8).hexdigest()
+    if _CONTAINER_ACCEPTS_KEY:
+        return st.container(key=f"msg_{message['id']}")
+    return st.container()
+
+def render_message(message):
+    """Render a single chat message."""
+    with message_container(message):
+        _render_message_body(message)
+
+def _render_message_body(message):
+    if message["role"] == "user":
+        with st.chat_message("user"):
+            st.markdown(message["content"])
+    elif message["role"] == "assistant":
+        with st.chat_message("assistant"):
+            st.markdown(message["content"])
+            if message.get("source_ids"):
+                render_sources(resolve_sources(message["source_ids"]))
+    elif message["role"] == "system":
+        st.info(message["content"])
+
+@_fragment
+def render_message_history():
+    """Render all chat messages except the newest one."""
+    for message in st.session_state.messages[:-1]:
+        render_message(message)
+
 def render_chat_interface():
     """Render the chat interface."""
     st.markdown("### 💬 Chat")
@@ -596,111 +922,141 @@ def render_chat_interface():
     chat_container = st.container()
     
     with chat_container:
-        for msg_idx, message in enumerate(st.session_state.messages):
-            if message["role"] == "user":
-                with st.chat_message("user"):
-                    st.write(message["content"])
-            elif message["role"] == "assistant":
-                with st.chat_message("assistant"):
-                    st.write(message["content"])
-                    if "sources" in message:
-                        with st.expander("📖 View Sources"):
-                            for i, source in enumerate(message["sources"][:3]):
-                                st.markdown(f"**Source {i+1}:**")
-                                content = source.page_content[:200] + "..." if len(source.page_content) > 200 else source.page_content
-                                st.text_area(
-                                    f"Content {i+1}:", 
-                                    content, 
-                                    height=80, 
-                                    key=f"source_msg_{msg_idx}_src_{i}",
-                                    disabled=True
-                                )
-            elif message["role"] == "system":
-                st.info(message["content"])
+        if st.session_state.archived_turns:
+            st.button(
+                f"⬆️ Load earlier messages ({st.session_state.archived_turns})",
+                on_click=load_earlier_messages,
+                type="secondary"
+            )
+        
+        # Only the newest message is rendered outside the fragment
+        render_message_history()
+        if st.session_state.messages:
+            render_message(st.session_state.messages[-1])
     
     if st.session_state.document_processed and st.session_state.qa_chain:
         st.markdown("### 🚀 Quick Actions")
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            if st.button("📄 Summarize Document", use_container_width=True):
-                handle_quick_action("Please provide a comprehensive summary of this document, highlighting the main points, important dates, requirements, and key information.")
-        
-        with col2:
-            if st.button("🎯 Key Points", use_container_width=True):
-                handle_quick_action("Extract the most important key points from this document in bullet format, focusing on deadlines, requirements, and procedures.")
-        
-        with col3:
-            if st.button("📋 Eligibility Criteria", use_container_width=True):
-                handle_quick_action("What are the eligibility criteria mentioned in this document?")
+        for col, (label, prompt) in zip(st.columns(len(_QUICK_ACTIONS)), _QUICK_ACTIONS):
+            col.button(label, use_container_width=True, on_click=handle_quick_action, args=(prompt,))
     elif st.session_state.messages and not st.session_state.document_processed:
         st.info("💡 Upload a document above to activate AI features and quick actions.")
     
+    # New turns are drawn into the chat container so they stay above Quick Actions on the next rerun
     if prompt := st.chat_input("Ask a question about your document..."):
-        handle_user_input(prompt)
+        with chat_container:
+            handle_user_input(prompt)
+    elif st.session_state.pending_question:
+        question = st.session_state.pending_question
+        st.session_state.pending_question = None
+        with chat_container:
+            process_question(question)
 
 def handle_quick_action(prompt):
-    """Handle quick action button clicks."""
+    """Queue a quick action prompt; it is answered during the rerun the click triggers."""
     if not st.session_state.qa_chain:
         st.warning("⚠️ Please upload a document first to use quick actions.")
         return
     
     st.session_state.messages.append({"role": "user", "content": prompt})
-    process_question(prompt)
-    st.rerun()
+    st.session_state.pending_question = prompt
 
 def handle_user_input(prompt):
     """Handle user input from chat."""
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    message = {"role": "user", "content": prompt}
+    st.session_state.messages.append(message)
+    render_message(message)
     process_question(prompt)
-    st.rerun()
+
+def add_assistant_message(content: str) -> None:
+    """Append an assistant message and render it in the current run."""
+    message = {"role": "assistant", "content": content}
+    st.session_state.messages.append(message)
+    render_message(message)
 
 def process_question(question):
     """Process a question and add response to messages."""
+    placeholder = None
     try:
         if not st.session_state.qa_chain:
             error_message = "⚠️ Please upload a document first to activate the AI assistant. The document needs to be processed before I can answer questions."
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": error_message
-            })
+            add_assistant_message(error_message)
             return
         
-        with st.spinner("🤔 Thinking..."):
-            qa_pipeline = QAPipeline()
-            result = qa_pipeline.ask_question(st.session_state.qa_chain, question)
-            
-            assistant_message = {
-                "role": "assistant",
-                "content": result["answer"]
-            }
-            
-            if result.get("source_documents"):
-                assistant_message["sources"] = result["source_documents"]
-            
-            st.session_state.messages.append(assistant_message)
-            
-            if 'user' in st.session_state and st.session_state.current_session_id:
-                user_id = st.session_state.user.get('localId')
-                auto_save_message(user_id, st.session_state.current_session_id, question, result["answer"])
-            
+        qa_pipeline = get_qa_pipeline()
+        
+        # The answer placeholder doubles as the progress indicator until tokens arrive
+        with st.chat_message("assistant"):
+            placeholder = st.empty()
+            placeholder.markdown("🤔 Thinking...")
+            sources_container = st.container()
+        
+        tokens = []
+        last_update = 0.0
+        
+        def on_token(token: str) -> None:
+            # Throttle redraws and show plain text while streaming;
+            # markdown is rendered once the answer is complete
+            nonlocal last_update
+            tokens.append(token)
+            now = time.monotonic()
+            if now - last_update >= STREAM_UPDATE_INTERVAL:
+                placeholder.text("".join(tokens))
+                last_update = now
+        
+        # Repeated questions (e.g. quick actions) are answered from the pipeline's per-document cache
+        result = qa_pipeline.ask_question(st.session_state.qa_chain, question, on_token=on_token)
+        
+        assistant_message = {
+            "role": "assistant",
+            "content": result["answer"],
+            "saved": False
+        }
+        
+        # Write every completed turn right away, since no later rerun is guaranteed (the tab may close);
+        # earlier failed writes are retried in the same batch, and the write overlaps with rendering
+        save_future = None
+        if 'user' in st.session_state and st.session_state.current_session_id:
+            user_id = st.session_state.user.get('localId')
+            queue_message_save(user_id, st.session_state.current_session_id, question, result["answer"], assistant_message)
+            pending = take_pending_saves()
+            save_future = _background_executor.submit(save_pending_messages, pending)
+        
+        placeholder.markdown(result["answer"])
+        
+        if result.get("source_documents"):
+            assistant_message["source_ids"] = cache_sources(result["source_documents"])
+            with sources_container:
+                render_sources(resolve_sources(assistant_message["source_ids"]))
+        
+        # Only turns that reached Firestore count as archived when the history is compacted
+        if save_future is not None:
+            finish_pending_saves(pending, save_future.result())
+        
+        st.session_state.messages.append(assistant_message)
+        compact_messages()
+        
     except Exception as e:
         error_message = f"❌ Sorry, I encountered an error: {str(e)}"
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": error_message
-        })
+        if placeholder is None:
+            add_assistant_message(error_message)
+        else:
+            # Reuse the bubble that was showing progress
+            placeholder.markdown(error_message)
+            st.session_state.messages.append({"role": "assistant", "content": error_message})
 
 def delete_chat_session(session_id: str, session_title: str):
     """Delete a chat session and its embeddings."""
     try:
         user_id = st.session_state.user.get('localId')
         if user_id:
-            qa_pipeline = QAPipeline()
-            qa_pipeline.delete_vector_store(user_id, session_id)
+            # Index removal can take a while; the Firestore delete is what the user waits on
+            qa_pipeline = get_qa_pipeline()
+            _delete_executor.submit(qa_pipeline.delete_vector_store, user_id, session_id)
+            st.session_state.qa_chain_cache.pop((user_id, session_id), None)
             
             success = st.session_state.auth_service.delete_chat_session(user_id, session_id)
             if success:
+                fetch_chat_sessions.clear()
                 if st.session_state.current_session_id == session_id:
                     start_new_chat()
                 else:
@@ -720,40 +1076,14 @@ def main():
         initial_sidebar_state="expanded"
     )
     
-    st.markdown("""
-    <style>
-    .main > div {
-        padding-top: 1rem;
-    }
-    .stChatMessage {
-        margin-bottom: 1rem;
-    }
-    .stButton > button {
-        width: 100%;
-    }
-    .stSelectbox > div > div {
-        background-color: #f0f2f6;
-    }
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 24px;
-    }
-    .stTabs [data-baseweb="tab"] {
-        height: 50px;
-        padding-left: 20px;
-        padding-right: 20px;
-    }
-    .css-1d391kg {
-        max-height: 70vh;
-        overflow-y: auto;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(_APP_CSS, unsafe_allow_html=True)
     
-    if not validate_config():
+    if not validated_config():
         st.error("❌ Configuration validation failed. Please check your environment variables.")
         return
     
     initialize_simple_session_state()
+    flush_pending_saves()
     handle_google_oauth_callback()
     
     if 'user' not in st.session_state:
@@ -766,11 +1096,7 @@ def main():
     render_chat_interface()
     
     st.markdown("---")
-    st.markdown("""
-    <div style="text-align: center; color: #666; padding: 1rem;">
-        Made for international students in Italy 🇮🇹
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,13 @@
+"""Page text extraction run in PDF worker processes.
+
+Spawned workers import this module to unpickle the task, so it depends on
+pypdf alone: importing app.config or LangChain there would repeat their
+start-up work (including the Gemini check) in every worker.
+"""
+from typing import List, Tuple
+from pypdf import PdfReader
+
+def extract_page_range(pdf_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Extract text for pages [start, end)."""
+    reader = PdfReader(pdf_path)
+    return [(i, reader.pages[i].extract_text()) for i in range(start, end)]
@@ -1,14 +1,38 @@
 import os
 import tempfile
+import functools
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from typing import List
-from langchain_community.document_loaders import PyPDFLoader
+from pypdf import PdfReader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
-from app.config import MAX_FILE_SIZE, CHUNK_SIZE, CHUNK_OVERLAP, TEXT_SEPARATORS
+from app.exceptions import DocumentRejectedError
+from app.pdf_pages import extract_page_range
+from app.config import MAX_FILE_SIZE, CHUNK_SIZE, CHUNK_OVERLAP, TEXT_SEPARATORS, PDF_PARALLEL_MIN_SIZE
 
 logger = logging.getLogger(__name__)
 
+def _available_cpus() -> int:
+    """Count the CPUs this process may run on, which respects container CPU limits."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+@functools.lru_cache(maxsize=1)
+def _page_pool() -> ProcessPoolExecutor:
+    """Return the process-wide page extraction pool.
+
+    Workers are spawned rather than forked: the app process is multi-threaded and
+    holds live gRPC channels, which are not fork-safe.
+    """
+    return ProcessPoolExecutor(
+        max_workers=_available_cpus(),
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
 class PDFProcessor:
     """Handles PDF loading, validation, and text chunking."""
 
@@ -22,31 +46,58 @@ class PDFProcessor:
     def validate_file(self, pdf_file) -> bool:
         """Validate PDF file size and type."""
         if pdf_file.size > MAX_FILE_SIZE:
-            raise ValueError(f"File size exceeds {MAX_FILE_SIZE / (1024*1024):.0f}MB limit")
+            raise DocumentRejectedError(f"File size exceeds {MAX_FILE_SIZE / (1024*1024):.0f}MB limit")
         
         if not pdf_file.name.lower().endswith('.pdf'):
-            raise ValueError("Only PDF files are supported")
+            raise DocumentRejectedError("Only PDF files are supported")
         
         return True
     
+    def _load_pages_parallel(self, pdf_path: str, source: str) -> List[Document]:
+        """Extract page text in worker processes; pypdf is pure Python, so threads wouldn't help."""
+        page_count = len(PdfReader(pdf_path).pages)
+        if not page_count:
+            return []
+        workers = max(1, min(_available_cpus(), page_count))
+        step = -(-page_count // workers)
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        
+        executor = _page_pool()
+        futures = [executor.submit(extract_page_range, pdf_path, start, end) for start, end in ranges]
+        pages = [page for future in futures for page in future.result()]
+        
+        return [
+            Document(page_content=text, metadata={'source': source, 'page': i})
+            for i, text in pages
+        ]
+    
     def load_and_process_pdf(self, pdf_file) -> List[Document]:
         """Load PDF, split into chunks, and add metadata."""
         try:
             self.validate_file(pdf_file)
             
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                tmp_file.write(pdf_file.getvalue())
-                tmp_path = tmp_file.name
-            
-            loader = PyPDFLoader(tmp_path)
-            documents = loader.load()
+            if pdf_file.size >= PDF_PARALLEL_MIN_SIZE:
+                # Worker processes share one temp file instead of each being sent a copy of the bytes
+                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+                    tmp_file.write(pdf_file.getbuffer())
+                    tmp_path = tmp_file.name
+                documents = self._load_pages_parallel(tmp_path, pdf_file.name)
+                os.unlink(tmp_path)
+            else:
+                # Parse straight from the in-memory upload; no disk round-trip
+                pdf_file.seek(0)
+                reader = PdfReader(pdf_file)
+                documents = [
+                    Document(page_content=page.extract_text(), metadata={'source': pdf_file.name, 'page': i})
+                    for i, page in enumerate(reader.pages)
+                ]
             
             if not documents:
-                raise ValueError("No content found in PDF")
+                raise DocumentRejectedError("No content found in PDF")
             
             chunks = self.text_splitter.split_documents(documents)
-            
-            os.unlink(tmp_path)
+            if not chunks:
+                raise DocumentRejectedError("No text found in PDF")
             
             for i, chunk in enumerate(chunks):
                 chunk.metadata.update({
@@ -1,20 +1,34 @@
+import functools
 import logging
 import hashlib
 import os
+import re
 import tempfile
 import shutil
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterator
 from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 from langchain_chroma import Chroma
 from langchain.chains import RetrievalQA
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain_core.embeddings import Embeddings
+from langchain.storage import LocalFileStore
 from langchain.schema import Document
+from langchain_core.prompts import format_document
 from app.config import (
     DEFAULT_MODEL, DEFAULT_TEMPERATURE,
     DEFAULT_K_DOCS, DEFAULT_FETCH_K, SEARCH_TYPE,
-    CHROMA_PERSIST_DIRECTORY, CHROMA_COLLECTION_PREFIX,
+    SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_DOCUMENTS,
+    CHROMA_PERSIST_DIRECTORY, CHROMA_COLLECTION_PREFIX, EMBEDDING_MODEL, EMBEDDING_CACHE_DIRECTORY,
+    EMBEDDING_BATCH_SIZE, EMBEDDING_CONCURRENCY, EMBEDDING_MAX_RETRIES,
     IS_PRODUCTION
 )
 from app.gcs_storage import GCSStorage
+from google.api_core import exceptions as gexceptions
 import chromadb
 
 # Set logger level based on environment
@@ -22,10 +36,31 @@ logger = logging.getLogger(__name__)
 if IS_PRODUCTION:
     logger.setLevel(logging.ERROR)
 
+# Greetings and thanks carry no question about the document, so they skip retrieval and the LLM
+SMALL_TALK_PATTERN = re.compile(
+    r"^\s*(hi|hello|hey|good (morning|afternoon|evening)|thanks?( you)?( so much)?|thx|ok(ay)?|bye|goodbye|"
+    r"ciao|salve|buongiorno|buonasera|grazie( mille)?)[\s!.?]*$",
+    re.IGNORECASE
+)
+SMALL_TALK_RESPONSE = "👋 Happy to help! Ask me anything about your document."
+
+@functools.lru_cache(maxsize=1024)
+def _collection_name(user_id: str, session_id: str) -> str:
+    """Hash the IDs into a collection name; pure, so it is cached across calls."""
+    safe_user_id = hashlib.md5(user_id.encode()).hexdigest()[:8]
+    safe_session_id = hashlib.md5(session_id.encode()).hexdigest()[:8]
+    return f"{CHROMA_COLLECTION_PREFIX}_{safe_user_id}_{safe_session_id}"
+
 class QAPipeline:
     def __init__(self):
-        self.embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+        self._llm = None
         self.gcs_storage = GCSStorage()
+        # Per-chain semantic answer caches, keyed by id(qa_chain); the pipeline is shared across sessions
+        self._semantic_caches: OrderedDict = OrderedDict()
+        self._semantic_cache_lock = threading.Lock()
+        # GCS backups run in the background; futures are kept so a delete can wait for them
+        self._upload_executor = ThreadPoolExecutor(max_workers=2)
+        self._pending_uploads: Dict[Tuple[str, str], Future] = {}
         # Initialize ChromaDB client with proper persistence settings
         self.chroma_client = chromadb.PersistentClient(
             path=CHROMA_PERSIST_DIRECTORY,
@@ -35,20 +70,122 @@ class QAPipeline:
             )
         )
     
+    @functools.cached_property
+    def embeddings(self) -> GoogleGenerativeAIEmbeddings:
+        """Embeddings client, created on first use."""
+        return GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+
+    def _document_embeddings(self, user_id: str, session_id: str) -> CacheBackedEmbeddings:
+        """Chunk embeddings cached on disk by content hash, so re-indexing a session skips the API.
+
+        Each session has its own cache directory, which is removed with its vector store.
+        """
+        return CacheBackedEmbeddings.from_bytes_store(
+            self.embeddings,
+            LocalFileStore(self._get_embedding_cache_path(user_id, session_id)),
+            namespace=EMBEDDING_MODEL,
+            key_encoder="sha256"
+        )
+
+    def _chat_model(self) -> ChatGoogleGenerativeAI:
+        """Return the shared chat model, creating it on first use so its HTTP client is reused."""
+        if self._llm is None:
+            self._llm = ChatGoogleGenerativeAI(
+                model=DEFAULT_MODEL,
+                temperature=DEFAULT_TEMPERATURE
+            )
+        return self._llm
+
     def generate_collection_name(self, user_id: str, session_id: str) -> str:
         """Generate a unique collection name for user session."""
-        safe_user_id = hashlib.md5(user_id.encode()).hexdigest()[:8]
-        safe_session_id = hashlib.md5(session_id.encode()).hexdigest()[:8]
-        collection_name = f"{CHROMA_COLLECTION_PREFIX}_{safe_user_id}_{safe_session_id}"
-        return collection_name
+        return _collection_name(user_id, session_id)
     
     def _get_collection_local_path(self, user_id: str, session_id: str) -> str:
         """Get local path for collection storage."""
         collection_name = self.generate_collection_name(user_id, session_id)
         return os.path.join(CHROMA_PERSIST_DIRECTORY, collection_name)
 
-    def create_vector_store(self, chunks: List[Document], user_id: str, session_id: str, persist: bool = True) -> Chroma:
-        """Create and persist vector store from document chunks with GCS backup."""
+    def _get_embedding_cache_path(self, user_id: str, session_id: str) -> str:
+        """Get local path for a session's chunk embedding cache."""
+        collection_name = self.generate_collection_name(user_id, session_id)
+        return os.path.join(EMBEDDING_CACHE_DIRECTORY, collection_name)
+
+    def _embed_batch(self, embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, backing off exponentially while the API is rate limiting."""
+        for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+            try:
+                return embeddings.embed_documents(texts)
+            except Exception as e:
+                # The embeddings client wraps API errors; look for a 429 anywhere in the chain
+                cause = e
+                while cause is not None and not isinstance(cause, gexceptions.ResourceExhausted):
+                    cause = cause.__cause__
+                if cause is None or attempt == EMBEDDING_MAX_RETRIES:
+                    raise
+                logger.warning(f"Embedding rate limited, retry {attempt + 1}/{EMBEDDING_MAX_RETRIES}")
+                time.sleep(2 ** attempt)
+
+    def _iter_embedded_batches(self, embeddings: Embeddings, texts: List[str]) -> Iterator[Tuple[int, List[List[float]]]]:
+        """Embed texts in fixed-size batches, yielding (start offset, vectors) as each batch finishes."""
+        starts = list(range(0, len(texts), EMBEDDING_BATCH_SIZE))
+        if not starts:
+            return
+        if len(starts) == 1:
+            yield 0, self._embed_batch(embeddings, texts)
+            return
+
+        with ThreadPoolExecutor(max_workers=min(EMBEDDING_CONCURRENCY, len(starts))) as executor:
+            futures = {
+                executor.submit(self._embed_batch, embeddings, texts[start:start + EMBEDDING_BATCH_SIZE]): start
+                for start in starts
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def _upload_collection(self, user_id: str, session_id: str) -> None:
+        """Upload a persisted collection to GCS for persistence across deployments."""
+        # Give ChromaDB time to write files to disk before GCS upload
+        time.sleep(1)
+
+        collection_local_path = self._get_collection_local_path(user_id, session_id)
+        if os.path.exists(collection_local_path):
+            upload_success = self.gcs_storage.upload_chroma_collection(collection_local_path, user_id, session_id)
+            if upload_success:
+                logger.info(f"Successfully uploaded vector store to GCS for user {user_id}, session {session_id}")
+            else:
+                logger.warning(f"Failed to upload vector store to GCS for user {user_id}, session {session_id}")
+        else:
+            logger.warning(f"Collection local path not found for GCS upload: {collection_local_path}")
+
+    def _forget_upload(self, key: Tuple[str, str], future: Future) -> None:
+        """Drop a finished upload from the pending map unless a newer one replaced it."""
+        if self._pending_uploads.get(key) is future:
+            self._pending_uploads.pop(key, None)
+
+    @staticmethod
+    def _chunk_ids(chunks: List[Document]) -> List[str]:
+        """Derive stable IDs from chunk content and source file; repeats of a chunk are numbered.
+
+        Positional metadata such as chunk_id and total_chunks is left out, so adding or
+        removing one chunk doesn't change the IDs of all the others.
+        """
+        occurrences: Dict[str, int] = {}
+        ids = []
+        for chunk in chunks:
+            source_file = chunk.metadata.get("source_file", "")
+            digest = hashlib.sha256(f"{source_file}\x00{chunk.page_content}".encode()).hexdigest()[:32]
+            occurrence = occurrences.get(digest, 0)
+            occurrences[digest] = occurrence + 1
+            ids.append(f"{digest}-{occurrence}")
+        return ids
+
+    def create_vector_store(self, chunks: List[Document], user_id: str, session_id: str, persist: bool = True) -> Tuple[Chroma, int]:
+        """Create and persist vector store from document chunks with GCS backup.
+
+        Chunk IDs are content hashes, so re-indexing into an existing collection only
+        embeds chunks that changed. Returns the vector store together with the number
+        of chunks it holds.
+        """
         if not chunks:
             raise ValueError("No document chunks provided to create vector store.")
 
@@ -57,11 +194,44 @@ class QAPipeline:
         # Determine persistence directory based on the 'persist' flag
         persist_directory = CHROMA_PERSIST_DIRECTORY if persist else None
 
-        # Create ChromaDB vector store
-        vector_store = Chroma.from_documents(
-            documents=chunks,
-            embedding=self.embeddings,
+        texts = [chunk.page_content for chunk in chunks]
+        metadatas = [chunk.metadata for chunk in chunks]
+        ids = self._chunk_ids(chunks)
+
+        # Sync the collection incrementally: drop chunks that are gone, embed only the ones that are new
+        collection = self.chroma_client.get_or_create_collection(collection_name)
+        existing_ids = set(collection.get(include=[])["ids"])
+        stale_ids = list(existing_ids.difference(ids))
+        if stale_ids:
+            collection.delete(ids=stale_ids)
+        new_positions = [i for i, chunk_id in enumerate(ids) if chunk_id not in existing_ids]
+        kept_positions = [i for i, chunk_id in enumerate(ids) if chunk_id in existing_ids]
+        if kept_positions:
+            # Kept chunks may have moved, so refresh their positional metadata without re-embedding
+            collection.update(
+                ids=[ids[i] for i in kept_positions],
+                metadatas=[metadatas[i] for i in kept_positions]
+            )
+        if not IS_PRODUCTION:
+            logger.info(f"Collection '{collection_name}': {len(new_positions)} new, "
+                        f"{len(kept_positions)} unchanged, {len(stale_ids)} removed chunks")
+
+        # Write each embedded batch straight into the collection while later batches are still in flight
+        new_texts = [texts[i] for i in new_positions]
+        # Embedding batches are far below Chroma's max batch size, so each one is a single upsert
+        embeddings = self._document_embeddings(user_id, session_id)
+        for start, vectors in self._iter_embedded_batches(embeddings, new_texts):
+            positions = new_positions[start:start + len(vectors)]
+            collection.upsert(
+                ids=[ids[i] for i in positions],
+                embeddings=vectors,
+                metadatas=[metadatas[i] for i in positions],
+                documents=[texts[i] for i in positions]
+            )
+
+        vector_store = Chroma(
             collection_name=collection_name,
+            embedding_function=self.embeddings,
             persist_directory=persist_directory,
             client=self.chroma_client
         )
@@ -72,24 +242,20 @@ class QAPipeline:
             # We can force a persist call to be sure, though it's often implicit.
             self.chroma_client.persist()
 
-            # Give ChromaDB time to write files to disk before GCS upload
-            import time
-            time.sleep(1)
-
-            # Upload to GCS for persistence across deployments
-            collection_local_path = self._get_collection_local_path(user_id, session_id)
-            if os.path.exists(collection_local_path):
-                upload_success = self.gcs_storage.upload_chroma_collection(collection_local_path, user_id, session_id)
-                if upload_success:
-                    logger.info(f"Successfully uploaded vector store to GCS for user {user_id}, session {session_id}")
-                else:
-                    logger.warning(f"Failed to upload vector store to GCS for user {user_id}, session {session_id}")
-            else:
-                logger.warning(f"Collection local path not found for GCS upload: {collection_local_path}")
+            # Back up to GCS in the background; the store is already usable locally
+            future = self._upload_executor.submit(self._upload_collection, user_id, session_id)
+            self._pending_uploads[(user_id, session_id)] = future
+            future.add_done_callback(functools.partial(self._forget_upload, (user_id, session_id)))
         else:
             logger.info(f"Created in-memory vector store '{collection_name}' for evaluation.")
 
-        return vector_store
+        return vector_store, len(chunks)
+
+    def _probe_collection(self, collection) -> None:
+        """Run a 1-NN query with a stored vector so the index is exercised without an embedding API call."""
+        sample = collection.get(limit=1, include=["embeddings"])
+        if len(sample["embeddings"]):
+            collection.query(query_embeddings=[sample["embeddings"][0]], n_results=1)
 
     def load_vector_store(self, user_id: str, session_id: str) -> Optional[Chroma]:
         """Load existing vector store for a user session, downloading from GCS if needed."""
@@ -111,9 +277,7 @@ class QAPipeline:
                         client=self.chroma_client
                     )
                     
-                    # Verify the vector store is functional
-                    test_results = vector_store.similarity_search("test", k=1)
-                    
+                    # The non-empty count above is enough of a health check for a collection already on disk
                     if not IS_PRODUCTION:
                         logger.info(f"Loaded existing local vector store '{collection_name}' with {doc_count} documents")
                     return vector_store
@@ -137,10 +301,9 @@ class QAPipeline:
                             client=self.chroma_client
                         )
                         
-                        # Verify the vector store is functional
-                        test_results = vector_store.similarity_search("test", k=1)
-                        
+                        # Verify the freshly downloaded vector store is functional
                         collection = self.chroma_client.get_collection(collection_name)
+                        self._probe_collection(collection)
                         doc_count = collection.count()
                         
                         logger.info(f"Successfully loaded vector store from GCS '{collection_name}' with {doc_count} documents")
@@ -172,6 +335,14 @@ class QAPipeline:
             
             success = True
             
+            # Don't let an in-flight backup re-create the collection in GCS after it is deleted
+            pending_upload = self._pending_uploads.pop((user_id, session_id), None)
+            if pending_upload is not None and not pending_upload.cancel():
+                try:
+                    pending_upload.result()
+                except Exception as e:
+                    logger.warning(f"Pending GCS upload failed before delete: {e}")
+            
             # Delete from local ChromaDB
             try:
                 self.chroma_client.delete_collection(collection_name)
@@ -182,14 +353,15 @@ class QAPipeline:
                     logger.info(f"Local collection '{collection_name}' not found (this is normal): {e}")
                
             
-            # Delete local files
-            if os.path.exists(collection_local_path):
-                try:
-                    shutil.rmtree(collection_local_path)
-                    if not IS_PRODUCTION:
-                        logger.info(f"Deleted local collection files: {collection_local_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to delete local files: {e}")
+            # Delete local files, including the session's cached chunk embeddings
+            for local_path in (collection_local_path, self._get_embedding_cache_path(user_id, session_id)):
+                if os.path.exists(local_path):
+                    try:
+                        shutil.rmtree(local_path)
+                        if not IS_PRODUCTION:
+                            logger.info(f"Deleted local collection files: {local_path}")
+                    except Exception as e:
+                        logger.warning(f"Failed to delete local files: {e}")
             
             # Delete from GCS
             if not self.gcs_storage.delete_chroma_collection(user_id, session_id):
@@ -212,10 +384,7 @@ class QAPipeline:
     def setup_qa_chain(self, vector_store: Chroma) -> RetrievalQA:
         """Setup the question-answering chain with default settings."""
         try:
-            llm = ChatGoogleGenerativeAI(
-                model=DEFAULT_MODEL,
-                temperature=DEFAULT_TEMPERATURE
-            )
+            llm = self._chat_model()
             
             retriever = vector_store.as_retriever(
                 search_type=SEARCH_TYPE,
@@ -236,19 +405,156 @@ class QAPipeline:
             logger.error(f"Error setting up QA chain: {str(e)}")
             raise e
     
-    def ask_question(self, qa_chain: RetrievalQA, question: str) -> Dict[str, Any]:
-        """Ask a question and get an answer with sources."""
+    def _stream_answer(self, qa_chain: RetrievalQA, question: str, source_documents: List[Document]) -> Iterator[str]:
+        """Stream answer tokens from the chain's LLM for already retrieved documents."""
+        combine_chain = qa_chain.combine_documents_chain
+        llm_chain = combine_chain.llm_chain
+        context = combine_chain.document_separator.join(
+            format_document(doc, combine_chain.document_prompt) for doc in source_documents
+        )
+        prompt_value = llm_chain.prompt.format_prompt(**{
+            combine_chain.document_variable_name: context,
+            "question": question
+        })
+        for chunk in llm_chain.llm.stream(prompt_value):
+            if chunk.content:
+                yield chunk.content
+    
+    def _embed_question(self, question: str) -> Tuple[Optional[List[float]], Optional[np.ndarray]]:
+        """Embed a question once for both retrieval and the semantic cache.
+
+        Returns the raw embedding and its unit-length copy, or (None, None) if it can't be computed.
+        """
+        try:
+            embedding = self.embeddings.embed_query(question)
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if not norm:
+                return None, None
+            return embedding, vector / norm
+        except Exception as e:
+            logger.warning(f"Question embedding failed, skipping semantic cache: {e}")
+            return None, None
+
+    def _retrieve(self, qa_chain: RetrievalQA, question: str, query_embedding: Optional[List[float]]) -> List[Document]:
+        """Retrieve context documents, reusing an already computed query embedding."""
+        retriever = qa_chain.retriever
+        if query_embedding is not None:
+            if retriever.search_type == "mmr":
+                return retriever.vectorstore.max_marginal_relevance_search_by_vector(query_embedding, **retriever.search_kwargs)
+            if retriever.search_type == "similarity":
+                return retriever.vectorstore.similarity_search_by_vector(query_embedding, **retriever.search_kwargs)
+        return retriever.invoke(question)
+
+    def _semantic_cache(self, qa_chain: RetrievalQA) -> Dict[str, Any]:
+        """Return the semantic cache for a chain, creating it on first use."""
+        with self._semantic_cache_lock:
+            cache = self._semantic_caches.get(id(qa_chain))
+            # Holding the chain guards against a recycled id() pointing at a stale cache
+            if cache is None or cache["chain"] is not qa_chain:
+                cache = {"chain": qa_chain, "vectors": None, "responses": [], "exact": OrderedDict()}
+                self._semantic_caches[id(qa_chain)] = cache
+            self._semantic_caches.move_to_end(id(qa_chain))
+            if len(self._semantic_caches) > SEMANTIC_CACHE_DOCUMENTS:
+                self._semantic_caches.popitem(last=False)
+            return cache
+
+    def _lookup_exact_answer(self, qa_chain: RetrievalQA, question_key: str) -> Optional[Tuple[str, List[Document]]]:
+        """Return a cached (answer, sources) for a repeat of an earlier question, without embedding it."""
+        cache = self._semantic_cache(qa_chain)
+        with self._semantic_cache_lock:
+            return cache["exact"].get(question_key)
+
+    def _lookup_semantic_cache(self, qa_chain: RetrievalQA, query_vector: np.ndarray) -> Optional[Tuple[str, List[Document]]]:
+        """Return a cached (answer, sources) for a near-identical earlier question."""
+        cache = self._semantic_cache(qa_chain)
+        with self._semantic_cache_lock:
+            if cache["vectors"] is None:
+                return None
+            similarities = cache["vectors"] @ query_vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= SEMANTIC_CACHE_THRESHOLD:
+                return cache["responses"][best]
+            return None
+
+    def _store_semantic_cache(self, qa_chain: RetrievalQA, question_key: str, query_vector: Optional[np.ndarray],
+                              answer: str, source_documents: List[Document]) -> None:
+        """Remember an answer, keeping only the most recent entries."""
+        cache = self._semantic_cache(qa_chain)
+        with self._semantic_cache_lock:
+            cache["exact"][question_key] = (answer, source_documents)
+            if len(cache["exact"]) > SEMANTIC_CACHE_SIZE:
+                cache["exact"].popitem(last=False)
+            if query_vector is None:
+                return
+            vectors = query_vector[np.newaxis, :] if cache["vectors"] is None else np.vstack([cache["vectors"], query_vector])
+            cache["vectors"] = vectors[-SEMANTIC_CACHE_SIZE:]
+            cache["responses"].append((answer, source_documents))
+            del cache["responses"][:-SEMANTIC_CACHE_SIZE]
+
+    def ask_question(self, qa_chain: RetrievalQA, question: str,
+                     on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Ask a question and get an answer with sources.
+        
+        If on_token is given, the answer is streamed and each token is passed to it as it arrives.
+        Near-identical earlier questions against the same chain are answered from cache,
+        and greetings or thanks get a canned reply without touching the chain.
+        """
         try:
             if not question.strip():
                 raise ValueError("Question cannot be empty")
             
-            result = qa_chain.invoke({"query": question})
+            if SMALL_TALK_PATTERN.match(question):
+                if on_token is not None:
+                    on_token(SMALL_TALK_RESPONSE)
+                return {
+                    "question": question,
+                    "answer": SMALL_TALK_RESPONSE,
+                    "source_documents": [],
+                    "sources_count": 0
+                }
+            
+            # Exact repeats (ignoring case and spacing) skip even the question embedding
+            question_key = " ".join(question.casefold().split())
+            cached = self._lookup_exact_answer(qa_chain, question_key)
+            query_embedding = query_vector = None
+            if cached is None:
+                query_embedding, query_vector = self._embed_question(question)
+                if query_vector is not None:
+                    cached = self._lookup_semantic_cache(qa_chain, query_vector)
+            
+            if cached is not None:
+                answer, source_documents = cached
+                if on_token is not None:
+                    on_token(answer)
+            elif on_token is None and query_embedding is None:
+                # No usable embedding to reuse; let the chain retrieve on its own
+                result = qa_chain.invoke({"query": question})
+                answer = result["result"]
+                source_documents = result.get("source_documents", [])
+            elif on_token is None:
+                source_documents = self._retrieve(qa_chain, question, query_embedding)
+                result = qa_chain.combine_documents_chain.invoke({
+                    "input_documents": source_documents,
+                    "question": question
+                })
+                answer = result["output_text"]
+            else:
+                source_documents = self._retrieve(qa_chain, question, query_embedding)
+                tokens = []
+                for token in self._stream_answer(qa_chain, question, source_documents):
+                    tokens.append(token)
+                    on_token(token)
+                answer = "".join(tokens)
+            
+            if cached is None:
+                self._store_semantic_cache(qa_chain, question_key, query_vector, answer, source_documents)
             
             response = {
                 "question": question,
-                "answer": result["result"],
-                "source_documents": result.get("source_documents", []),
-                "sources_count": len(result.get("source_documents", []))
+                "answer": answer,
+                "source_documents": source_documents,
+                "sources_count": len(source_documents)
             }
             
             if not IS_PRODUCTION:
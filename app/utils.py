@@ -6,16 +6,15 @@ logger = logging.getLogger(__name__)
 
 def format_file_size(size_bytes: int) -> str:
     """Format file size in human readable format."""
-    if size_bytes == 0:
+    if size_bytes <= 0:
         return "0 B"
     
     size_names = ["B", "KB", "MB", "GB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
+    # Each unit is 2**10 of the previous one, so the bit length picks it directly
+    # Sizes below one byte have bit length 0, so clamp at the bytes unit
+    i = max(0, min((int(size_bytes).bit_length() - 1) // 10, len(size_names) - 1))
     
-    return f"{size_bytes:.1f} {size_names[i]}"
+    return f"{size_bytes / (1 << (10 * i)):.1f} {size_names[i]}"
 
 def handle_error(e: Exception, message: str = "An error occurred.") -> None:
     """Handle and display errors in a standardized way."""
@@ -24,7 +24,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from app.qa_pipeline import QAPipeline
 from app.pdf_processing import PDFProcessor
 from langchain.schema import Document
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
 class RAGEvaluator:
     """Evaluator for RAG system performance using enhanced semantic similarity."""
@@ -73,31 +73,52 @@ class RAGEvaluator:
         Semantic similarity using the same embeddings as the app (Google Generative AI).
         Returns a score between 0 and 1.
         """
-        if not answer or not expected_answer:
-            return 0.0
+        return self.evaluate_answer_accuracies([(answer, expected_answer)], threshold)[0]
 
-        # Preprocess
-        answer_clean = self._preprocess_text(answer)
-        expected_clean = self._preprocess_text(expected_answer)
-        if not answer_clean or not expected_clean:
-            return 0.0
-        if answer_clean == expected_clean:
-            return 1.0
+    def evaluate_answer_accuracies(self, pairs: List[Tuple[str, str]], threshold: float = 0.6) -> List[float]:
+        """
+        Score many (answer, expected_answer) pairs with a single batched embedding request.
+        Returns one score between 0 and 1 per pair.
+        """
+        scores: List[Optional[float]] = []
+        to_embed = []
+        for answer, expected_answer in pairs:
+            if not answer or not expected_answer:
+                scores.append(0.0)
+                continue
+
+            # Preprocess
+            answer_clean = self._preprocess_text(answer)
+            expected_clean = self._preprocess_text(expected_answer)
+            if not answer_clean or not expected_clean:
+                scores.append(0.0)
+            elif answer_clean == expected_clean:
+                scores.append(1.0)
+            else:
+                scores.append(None)
+                to_embed.append((len(scores) - 1, answer_clean, expected_clean))
+
+        if not to_embed:
+            return scores
 
         try:
-            # Embed both strings with the app’s embedding model
-            vecs = self.embedding_model.embed_documents([answer_clean, expected_clean])
-            similarity = cosine_similarity([vecs[0]], [vecs[1]])[0][0]
+            # Embed every remaining string in one call with the app’s embedding model
+            texts = [text for _, answer_clean, expected_clean in to_embed for text in (answer_clean, expected_clean)]
+            vecs = np.asarray(self.embedding_model.embed_documents(texts))
+            similarities = cosine_similarity(vecs[0::2], vecs[1::2]).diagonal()
 
-            if similarity >= threshold:
-                return float(similarity)
-            elif similarity >= threshold * 0.7:
-                return float(similarity * 0.8)
-            else:
-                return float(similarity * 0.3)
+            for (index, _, _), similarity in zip(to_embed, similarities):
+                if similarity >= threshold:
+                    scores[index] = float(similarity)
+                elif similarity >= threshold * 0.7:
+                    scores[index] = float(similarity * 0.8)
+                else:
+                    scores[index] = float(similarity * 0.3)
         except Exception as e:
             print(f"Error calculating similarity: {e}")
-            return self._enhanced_fallback_similarity(answer_clean, expected_clean)
+            for index, answer_clean, expected_clean in to_embed:
+                scores[index] = self._enhanced_fallback_similarity(answer_clean, expected_clean)
+        return scores
 
     def _enhanced_fallback_similarity(self, answer: str, expected: str) -> float:
         """Enhanced fallback similarity calculation with better word matching."""
@@ -185,7 +206,7 @@ class RAGEvaluator:
         # 3. Build the Vector Store and QA Chain
         print("🧠 Building vector store and setting up QA chain...")
         try:
-            vector_store = self.qa_pipeline.create_vector_store(chunks, "evaluation_user", "evaluation_session", persist=False)
+            vector_store, _ = self.qa_pipeline.create_vector_store(chunks, "evaluation_user", "evaluation_session", persist=False)
             qa_chain = self.qa_pipeline.setup_qa_chain(vector_store)
             print("✅ QA pipeline is ready.")
         except Exception as e:
@@ -214,23 +235,19 @@ class RAGEvaluator:
                     result = self.qa_pipeline.ask_question(qa_chain, question)
                     answer = result.get("answer", "")
                     
-                    # Calculate enhanced semantic similarity score
-                    accuracy = self.evaluate_answer_accuracy(answer, expected_answer)
                     completeness = self.evaluate_answer_completeness(answer)
                     
+                    # Accuracy is scored for all answers in one batch below
                     results_detail.append({
                         "test_id": test_case["id"],
                         "language": lang,
                         "question": question,
                         "answer": answer,
                         "expected_answer": expected_answer,
-                        "accuracy_score": accuracy,
+                        "accuracy_score": 0.0,
                         "is_complete": completeness,
                     })
                     
-                    # Enhanced logging for debugging
-                    print(f"    - {lang.upper()}: {accuracy:.2%} accuracy (complete: {'✅' if completeness else '❌'})")
-                    
                 except Exception as e:
                     print(f"    - ⚠️ Error processing question '{question}': {e}")
                     results_detail.append({
@@ -239,8 +256,17 @@ class RAGEvaluator:
                         "accuracy_score": 0.0, "is_complete": False,
                     })
 
-        # 5. Calculate and summarize results
+        # 5. Calculate enhanced semantic similarity scores with one embedding request
         successful_tests = [r for r in results_detail if not r["answer"].startswith("ERROR:")]
+        accuracies = self.evaluate_answer_accuracies(
+            [(r["answer"], r["expected_answer"]) for r in successful_tests]
+        )
+        for r, accuracy in zip(successful_tests, accuracies):
+            r["accuracy_score"] = accuracy
+            # Enhanced logging for debugging
+            print(f"    - {r['test_id']} {r['language'].upper()}: {accuracy:.2%} accuracy (complete: {'✅' if r['is_complete'] else '❌'})")
+
+        # 6. Summarize results
         overall_accuracy = sum(r["accuracy_score"] for r in successful_tests) / len(successful_tests) if successful_tests else 0.0
         overall_completeness = sum(1 for r in successful_tests if r["is_complete"]) / len(successful_tests) if successful_tests else 0.0
 
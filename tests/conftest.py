@@ -23,5 +23,23 @@ def mock_pdf_file():
     mock_file = Mock()
     mock_file.name = "test.pdf"
     mock_file.size = 1024 * 1024
-    mock_file.getvalue.return_value = b"mock pdf content"
-    return mock_file
\ No newline at end of file
+    mock_file.getbuffer.return_value = b"mock pdf content"
+    return mock_file
+
+@pytest.fixture
+def qa_pipeline(mock_env_vars):
+    """Create a QA pipeline with a mock embeddings client."""
+    from app.qa_pipeline import QAPipeline
+    qa_pipeline = QAPipeline()
+    qa_pipeline.embeddings = Mock()
+    return qa_pipeline
+
+@pytest.fixture
+def mock_qa_chain():
+    """Create a mock QA chain with a similarity retriever that answers "Answer"."""
+    mock_qa_chain = Mock()
+    mock_qa_chain.retriever.search_type = "similarity"
+    mock_qa_chain.retriever.search_kwargs = {"k": 5}
+    mock_qa_chain.retriever.vectorstore.similarity_search_by_vector.return_value = []
+    mock_qa_chain.combine_documents_chain.invoke.return_value = {"output_text": "Answer"}
+    return mock_qa_chain
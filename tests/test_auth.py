@@ -0,0 +1,52 @@
+from unittest.mock import Mock, patch
+from app.auth import AuthService
+
+class TestAuthService:
+    
+    @patch.object(AuthService, '_init_admin_sdk')
+    def test_get_document_reuses_recent_snapshot(self, mock_init):
+        """Test a recent snapshot is reused until the document is invalidated."""
+        auth_service = AuthService()
+        doc_ref = Mock()
+        doc_ref.path = "users/test_user/chat_sessions/test_session"
+        
+        first = auth_service._get_document(doc_ref)
+        second = auth_service._get_document(doc_ref)
+        auth_service._invalidate_document(doc_ref)
+        auth_service._get_document(doc_ref)
+        
+        assert first is second
+        assert doc_ref.get.call_count == 2
+    
+    @patch.object(AuthService, '_init_admin_sdk')
+    def test_get_document_refetches_after_ttl(self, mock_init):
+        """Test a snapshot older than the cache TTL is fetched again."""
+        auth_service = AuthService()
+        doc_ref = Mock()
+        doc_ref.path = "users/test_user/chat_sessions/test_session"
+        
+        with patch('app.auth.FIRESTORE_CACHE_TTL', 0):
+            auth_service._get_document(doc_ref)
+            auth_service._get_document(doc_ref)
+        
+        assert doc_ref.get.call_count == 2
+    
+    @patch('app.auth.firestore_client')
+    @patch.object(AuthService, '_init_admin_sdk')
+    def test_find_session_by_file_hash(self, mock_init, mock_firestore_client):
+        """Test a session is found by its document hash, with its ID attached."""
+        auth_service = AuthService()
+        sessions_ref = mock_firestore_client.return_value.collection.return_value.document.return_value.collection.return_value
+        query = sessions_ref.where.return_value.limit.return_value
+        doc = Mock()
+        doc.id = "test_session"
+        doc.to_dict.return_value = {"session_title": "Bando"}
+        query.stream.return_value = [doc]
+        
+        session = auth_service.find_session_by_file_hash("test_user", "abc123")
+        
+        assert session == {"session_title": "Bando", "id": "test_session"}
+        sessions_ref.where.assert_called_once_with('document_metadata.file_hash', '==', "abc123")
+        
+        query.stream.return_value = []
+        assert auth_service.find_session_by_file_hash("test_user", "abc123") is None
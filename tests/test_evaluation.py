@@ -0,0 +1,32 @@
+from unittest.mock import Mock
+from evaluation.run_evaluation import RAGEvaluator
+
+class TestRAGEvaluator:
+    
+    def test_evaluate_answer_accuracies_batches_embeddings(self):
+        """Test trivial pairs are scored directly and the rest share one embedding request."""
+        evaluator = RAGEvaluator.__new__(RAGEvaluator)
+        evaluator.embedding_model = Mock()
+        evaluator.embedding_model.embed_documents.return_value = [[1.0, 0.0], [1.0, 0.0], [1.0, 0.0], [0.0, 1.0]]
+        
+        scores = evaluator.evaluate_answer_accuracies([
+            ("", "deadline march"),
+            ("Deadline: March!", "deadline march"),
+            ("scholarship amount", "grant value"),
+            ("exam rules", "attendance requirements"),
+        ])
+        
+        assert scores == [0.0, 1.0, 1.0, 0.0]
+        evaluator.embedding_model.embed_documents.assert_called_once_with(
+            ["scholarship amount", "grant value", "exam rules", "attendance requirements"]
+        )
+    
+    def test_evaluate_answer_accuracies_falls_back_without_embeddings(self):
+        """Test word-overlap scoring is used when the embedding request fails."""
+        evaluator = RAGEvaluator.__new__(RAGEvaluator)
+        evaluator.embedding_model = Mock()
+        evaluator.embedding_model.embed_documents.side_effect = RuntimeError("quota")
+        
+        scores = evaluator.evaluate_answer_accuracies([("deadline march", "deadline april")])
+        
+        assert scores == [evaluator._enhanced_fallback_similarity("deadline march", "deadline april")]
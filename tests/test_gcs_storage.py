@@ -0,0 +1,48 @@
+import base64
+import hashlib
+import os
+from unittest.mock import Mock, patch
+from app.gcs_storage import GCSStorage
+
+def make_blob(name, content):
+    """Build a mock blob carrying the size and MD5 GCS reports for content."""
+    blob = Mock()
+    blob.name = name
+    blob.size = len(content)
+    blob.md5_hash = base64.b64encode(hashlib.md5(content).digest()).decode()
+    return blob
+
+class TestGCSStorage:
+    
+    def test_matches_local_file(self, tmp_path):
+        """Test a local file matches a blob only with the same size and MD5."""
+        local_file = tmp_path / "data.bin"
+        local_file.write_bytes(b"same")
+        
+        assert GCSStorage._matches_local_file(make_blob("data.bin", b"same"), str(local_file))
+        assert not GCSStorage._matches_local_file(make_blob("data.bin", b"diff"), str(local_file))
+        assert not GCSStorage._matches_local_file(make_blob("data.bin", b"longer"), str(local_file))
+        assert not GCSStorage._matches_local_file(make_blob("data.bin", b"same"), str(tmp_path / "missing.bin"))
+    
+    @patch('app.gcs_storage.storage')
+    @patch('app.gcs_storage.default', return_value=(Mock(), "test-project"))
+    def test_download_skips_unchanged_files(self, mock_default, mock_storage, tmp_path):
+        """Test only files that are missing or differ locally are downloaded."""
+        gcs_storage = GCSStorage()
+        prefix = "chroma_db/test_user/test_session/"
+        (tmp_path / "index").mkdir()
+        (tmp_path / "unchanged.bin").write_bytes(b"same")
+        (tmp_path / "index" / "changed.bin").write_bytes(b"old")
+        unchanged = make_blob(prefix + "unchanged.bin", b"same")
+        changed = make_blob(prefix + "index/changed.bin", b"new")
+        missing = make_blob(prefix + "missing.bin", b"data")
+        gcs_storage.bucket = Mock()
+        gcs_storage.bucket.list_blobs.return_value = [unchanged, changed, missing]
+        
+        with patch('app.gcs_storage.GCS_CHROMA_PREFIX', "chroma_db/"):
+            success = gcs_storage.download_chroma_collection(str(tmp_path), "test_user", "test_session")
+        
+        assert success is True
+        unchanged.download_to_filename.assert_not_called()
+        changed.download_to_filename.assert_called_once_with(os.path.join(str(tmp_path), "index/changed.bin"))
+        missing.download_to_filename.assert_called_once_with(os.path.join(str(tmp_path), "missing.bin"))
@@ -7,14 +7,14 @@ from langchain.schema import Document
 class TestIntegration:
     
     @patch('app.qa_pipeline.GoogleGenerativeAIEmbeddings')
-    @patch('app.pdf_processing.PyPDFLoader')
+    @patch('app.pdf_processing.PdfReader')
     @patch('langchain_community.vectorstores.Chroma')
     @patch('app.qa_pipeline.ChatGoogleGenerativeAI')
     @patch('langchain.chains.RetrievalQA')
     @patch('tempfile.NamedTemporaryFile')
     @patch('os.unlink')
     def test_full_pdf_qa_pipeline(self, mock_unlink, mock_tempfile, mock_retrieval_qa, 
-                                 mock_chat_ai, mock_chroma, mock_loader, mock_embeddings, mock_env_vars):
+                                 mock_chat_ai, mock_chroma, mock_reader, mock_embeddings, mock_env_vars):
         """Test complete pipeline: PDF upload → processing → Q&A."""
         
         # Setup file mock
@@ -24,7 +24,9 @@ class TestIntegration:
         
         # Setup document mock
         mock_documents = [Document(page_content="AI is artificial intelligence.", metadata={"page": 1})]
-        mock_loader.return_value.load.return_value = mock_documents
+        mock_page = Mock()
+        mock_page.extract_text.return_value = "AI is artificial intelligence."
+        mock_reader.return_value.pages = [mock_page]
         
         # Setup embeddings mock
         mock_embeddings_instance = Mock()
@@ -50,14 +52,14 @@ class TestIntegration:
         mock_pdf_file = Mock()
         mock_pdf_file.name = "test.pdf"
         mock_pdf_file.size = 1024
-        mock_pdf_file.getvalue.return_value = b"mock pdf content"
+        mock_pdf_file.getbuffer.return_value = b"mock pdf content"
         
         # Test the pipeline
         chunks = pdf_processor.load_and_process_pdf(mock_pdf_file)
         
         # Mock create_vector_store to return mock vector store
-        with patch.object(qa_pipeline, 'create_vector_store', return_value=mock_vector_store):
-            vector_store = qa_pipeline.create_vector_store(chunks, "test_user", "test_session")
+        with patch.object(qa_pipeline, 'create_vector_store', return_value=(mock_vector_store, len(chunks))):
+            vector_store, inserted = qa_pipeline.create_vector_store(chunks, "test_user", "test_session")
         
         # Mock setup_qa_chain to return mock QA chain
         with patch.object(qa_pipeline, 'setup_qa_chain', return_value=mock_qa_chain):
@@ -69,6 +71,7 @@ class TestIntegration:
         # Validate results
         assert len(chunks) > 0
         assert vector_store is not None
+        assert inserted == len(chunks)
         assert qa_chain is not None
         assert result['question'] == "What is AI?"
         assert 'answer' in result
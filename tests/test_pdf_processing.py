@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import Mock, patch
+from app.exceptions import DocumentRejectedError
 from app.pdf_processing import PDFProcessor
 
 class TestPDFProcessor:
@@ -16,7 +17,7 @@ class TestPDFProcessor:
         mock_file.name = "large.pdf"
         mock_file.size = 100 * 1024 * 1024  # 100MB - exceeds limit
         
-        with pytest.raises(ValueError, match="File size exceeds"):
+        with pytest.raises(DocumentRejectedError, match="File size exceeds"):
             processor.validate_file(mock_file)
     
     def test_validate_file_wrong_type(self):
@@ -26,5 +27,27 @@ class TestPDFProcessor:
         mock_file.name = "document.txt"
         mock_file.size = 1024
         
-        with pytest.raises(ValueError, match="Only PDF files are supported"):
-            processor.validate_file(mock_file)
\ No newline at end of file
+        with pytest.raises(DocumentRejectedError, match="Only PDF files are supported"):
+            processor.validate_file(mock_file)
+    
+    def test_load_pages_parallel_splits_ranges_in_page_order(self):
+        """Test pages are split into one range per CPU and returned in page order."""
+        from concurrent.futures import ThreadPoolExecutor
+        processor = PDFProcessor()
+        mock_reader = Mock()
+        mock_reader.pages = [Mock()] * 10
+        requested = []
+        
+        def extract(pdf_path, start, end):
+            requested.append((start, end))
+            return [(i, f"page {i}") for i in range(start, end)]
+        
+        with patch('app.pdf_processing.PdfReader', return_value=mock_reader), \
+             patch('app.pdf_processing._available_cpus', return_value=3), \
+             patch('app.pdf_processing._page_pool', return_value=ThreadPoolExecutor(max_workers=3)), \
+             patch('app.pdf_processing.extract_page_range', side_effect=extract):
+            documents = processor._load_pages_parallel("test.pdf", "test.pdf")
+        
+        assert sorted(requested) == [(0, 4), (4, 8), (8, 10)]
+        assert [doc.metadata['page'] for doc in documents] == list(range(10))
+        assert [doc.page_content for doc in documents] == [f"page {i}" for i in range(10)]
@@ -1,3 +1,4 @@
+import os
 import pytest
 from unittest.mock import Mock, patch
 from app.qa_pipeline import QAPipeline
@@ -17,10 +18,162 @@ class TestQAPipeline:
         with pytest.raises(ValueError, match="No document chunks provided"):
             qa_pipeline.create_vector_store([], "test_user", "test_session")
     
+    @patch('app.qa_pipeline.Chroma')
+    def test_create_vector_store_embeds_only_new_chunks(self, mock_chroma, mock_env_vars, tmp_path):
+        """Test re-indexing keeps unchanged chunks, drops removed ones and embeds only new ones."""
+        from langchain.schema import Document
+        qa_pipeline = QAPipeline()
+        qa_pipeline.embeddings = Mock()
+        qa_pipeline.embeddings.embed_documents.side_effect = lambda batch: [[0.0]] * len(batch)
+        def chunk(text, chunk_id, total_chunks):
+            return Document(page_content=text, metadata={
+                "source": "doc.pdf", "page": 0, "source_file": "doc.pdf",
+                "chunk_id": chunk_id, "total_chunks": total_chunks
+            })
+        kept = chunk("Kept chunk", 0, 1)
+        collection = Mock()
+        collection.get.return_value = {"ids": qa_pipeline._chunk_ids([kept]) + ["removed-0"]}
+        qa_pipeline.chroma_client = Mock()
+        qa_pipeline.chroma_client.get_or_create_collection.return_value = collection
+        revised = [chunk("Kept chunk", 0, 2), chunk("New chunk", 1, 2)]
+        
+        with patch('app.qa_pipeline.EMBEDDING_CACHE_DIRECTORY', str(tmp_path)):
+            _, count = qa_pipeline.create_vector_store(revised, "test_user", "test_session", persist=False)
+        
+        assert count == 2
+        collection.delete.assert_called_once_with(ids=["removed-0"])
+        qa_pipeline.embeddings.embed_documents.assert_called_once_with(["New chunk"])
+        assert collection.upsert.call_args.kwargs["ids"] == qa_pipeline._chunk_ids(revised)[1:]
+        collection.update.assert_called_once_with(
+            ids=qa_pipeline._chunk_ids([kept]),
+            metadatas=[revised[0].metadata]
+        )
+    
+    def test_chunk_ids_stable_when_chunks_are_appended(self, mock_env_vars):
+        """Test appending a chunk keeps the IDs of the chunks already indexed."""
+        from langchain.schema import Document
+        texts = [f"chunk {i}" for i in range(5)]
+        def chunks(count):
+            return [
+                Document(page_content=text, metadata={
+                    "source": "doc.pdf", "page": 0, "source_file": "doc.pdf",
+                    "chunk_id": i, "total_chunks": count
+                })
+                for i, text in enumerate(texts[:count])
+            ]
+        
+        before = QAPipeline._chunk_ids(chunks(4))
+        after = QAPipeline._chunk_ids(chunks(5))
+        
+        assert after[:4] == before
+    
+    def test_delete_vector_store_removes_embedding_cache(self, mock_env_vars, tmp_path):
+        """Test deleting a session's vector store also deletes its cached chunk embeddings."""
+        qa_pipeline = QAPipeline()
+        qa_pipeline.chroma_client = Mock()
+        qa_pipeline.gcs_storage = Mock()
+        
+        with patch('app.qa_pipeline.EMBEDDING_CACHE_DIRECTORY', str(tmp_path)):
+            cache_path = qa_pipeline._get_embedding_cache_path("test_user", "test_session")
+            os.makedirs(cache_path)
+            qa_pipeline.delete_vector_store("test_user", "test_session")
+        
+        assert not os.path.exists(cache_path)
+    
+    def test_iter_embedded_batches_batches_requests(self, mock_env_vars):
+        """Test chunk texts are embedded in fixed-size batches, each yielded with its offset."""
+        qa_pipeline = QAPipeline()
+        embeddings = Mock()
+        embeddings.embed_documents.side_effect = lambda batch: [[0.0]] * len(batch)
+        
+        with patch('app.qa_pipeline.EMBEDDING_BATCH_SIZE', 100):
+            batches = dict(qa_pipeline._iter_embedded_batches(embeddings, [f"chunk {i}" for i in range(250)]))
+        
+        assert {start: len(vectors) for start, vectors in batches.items()} == {0: 100, 100: 100, 200: 50}
+        assert sorted(len(call.args[0]) for call in embeddings.embed_documents.call_args_list) == [50, 100, 100]
+        assert list(qa_pipeline._iter_embedded_batches(embeddings, [])) == []
+    
+    def test_embed_batch_retries_when_rate_limited(self, mock_env_vars):
+        """Test a rate-limited embedding batch is retried after backing off."""
+        from google.api_core import exceptions as gexceptions
+        qa_pipeline = QAPipeline()
+        qa_pipeline.embeddings = Mock()
+        rate_limited = RuntimeError("Error embedding content")
+        rate_limited.__cause__ = gexceptions.ResourceExhausted("quota")
+        qa_pipeline.embeddings.embed_documents.side_effect = [rate_limited, [[0.0]]]
+        
+        with patch('app.qa_pipeline.time.sleep') as mock_sleep:
+            vectors = qa_pipeline._embed_batch(qa_pipeline.embeddings, ["chunk"])
+        
+        assert vectors == [[0.0]]
+        mock_sleep.assert_called_once_with(1)
+    
     def test_ask_question_empty_question(self, mock_env_vars):
         """Test asking an empty question raises ValueError."""
         qa_pipeline = QAPipeline()
         mock_qa_chain = Mock()
         
         with pytest.raises(ValueError, match="Question cannot be empty"):
-            qa_pipeline.ask_question(mock_qa_chain, "")
\ No newline at end of file
+            qa_pipeline.ask_question(mock_qa_chain, "")
+    
+    def test_ask_question_small_talk_skips_chain(self, qa_pipeline):
+        """Test greetings get a canned reply without retrieval or an LLM call."""
+        mock_qa_chain = Mock()
+        
+        result = qa_pipeline.ask_question(mock_qa_chain, "Thanks!")
+        
+        assert result["source_documents"] == []
+        assert result["sources_count"] == 0
+        mock_qa_chain.invoke.assert_not_called()
+        qa_pipeline.embeddings.embed_query.assert_not_called()
+    
+    def test_ask_question_streams_tokens(self, qa_pipeline):
+        """Test streamed answers are forwarded token by token and joined."""
+        qa_pipeline.embeddings.embed_query.return_value = [1.0, 0.0]
+        mock_qa_chain = Mock()
+        mock_qa_chain.retriever.invoke.return_value = [Mock()]
+        received = []
+        
+        with patch.object(qa_pipeline, '_stream_answer', return_value=iter(["AI ", "is ", "great"])):
+            result = qa_pipeline.ask_question(mock_qa_chain, "What is AI?", on_token=received.append)
+        
+        assert received == ["AI ", "is ", "great"]
+        assert result['answer'] == "AI is great"
+        assert result['sources_count'] == 1
+        mock_qa_chain.invoke.assert_not_called()
+    
+    def test_ask_question_answers_similar_question_from_cache(self, qa_pipeline, mock_qa_chain):
+        """Test a near-identical question reuses the earlier answer without running the chain."""
+        qa_pipeline.embeddings.embed_query.side_effect = [[1.0, 0.0], [0.999, 0.01], [0.0, 1.0]]
+        
+        first = qa_pipeline.ask_question(mock_qa_chain, "What is AI?")
+        second = qa_pipeline.ask_question(mock_qa_chain, "What's AI?")
+        qa_pipeline.ask_question(mock_qa_chain, "Who wrote this?")
+        
+        assert first['answer'] == second['answer'] == "Answer"
+        assert mock_qa_chain.combine_documents_chain.invoke.call_count == 2
+    
+    def test_ask_question_repeat_skips_embedding(self, qa_pipeline, mock_qa_chain):
+        """Test an exact repeat is answered from cache without embedding the question again."""
+        qa_pipeline.embeddings.embed_query.return_value = [1.0, 0.0]
+        
+        qa_pipeline.ask_question(mock_qa_chain, "What is AI?")
+        repeat = qa_pipeline.ask_question(mock_qa_chain, "  what is  AI?")
+        
+        assert repeat['answer'] == "Answer"
+        qa_pipeline.embeddings.embed_query.assert_called_once()
+        mock_qa_chain.combine_documents_chain.invoke.assert_called_once()
+    
+    def test_ask_question_retrieves_with_question_embedding(self, qa_pipeline, mock_qa_chain):
+        """Test retrieval reuses the question embedding instead of embedding again."""
+        qa_pipeline.embeddings.embed_query.return_value = [0.6, 0.8]
+        mock_qa_chain.retriever.search_type = "mmr"
+        vectorstore = mock_qa_chain.retriever.vectorstore
+        vectorstore.max_marginal_relevance_search_by_vector.return_value = [Mock()]
+        
+        result = qa_pipeline.ask_question(mock_qa_chain, "What is AI?")
+        
+        assert result['sources_count'] == 1
+        vectorstore.max_marginal_relevance_search_by_vector.assert_called_once_with([0.6, 0.8], k=5)
+        qa_pipeline.embeddings.embed_query.assert_called_once()
+        mock_qa_chain.retriever.invoke.assert_not_called()
@@ -10,6 +10,7 @@ class TestUtils:
         assert format_file_size(1024) == "1.0 KB"
         assert format_file_size(1024 * 1024) == "1.0 MB"
         assert format_file_size(1024 * 1024 * 1024) == "1.0 GB"
+        assert format_file_size(0.5) == "0.5 B"
     
     def test_format_timestamp(self):
         """Test timestamp formatting."""